@@ -0,0 +1,19 @@
+from masterjantar.cache import PARSER_VERSION, ParseCache, parse_cache
+from masterjantar.grid import DISCREPANCY_COLUMNS, MonthGrid
+from masterjantar.ingest import iter_rows
+from masterjantar.instrument import StageLog, recording, stage
+from masterjantar.jantar import (JantarExport, parse_jantar, parse_jantar_sections, parse_jantar_stream,
+                                open_sessions, read_periods, worked_hours)
+from masterjantar.layout import Layout, layout_profiles, resolve_layout
+from masterjantar.loaders import LoadError, load_exports, load_jantar, load_masterteam, load_pn
+from masterjantar.masterteam import (melt_masterteam, parse_masterteam_stream, parse_period,
+                                    read_masterteam, read_period)
+from masterjantar.output import (FORMATS, XLSX_MIME, available_formats, deferred_output, download_args, inputs_key,
+                                 output_bytes, workbook_bytes, write_table, write_workbook)
+from masterjantar.periods import reconcile_periods, select_periods
+from masterjantar.persons import PersonIndex, assign_person_ids, normalize_name
+from masterjantar.pn import expand_pn, expand_pn_stream
+from masterjantar.report import REPORTS, reconcile, reconcile_files
+from masterjantar.rules import HOURS_TOLERANCE, RULES, Rule
+from masterjantar.store import DEFAULT_STORE_PATH, MonthStore, day_facts
+from masterjantar.viewer import PAGE_SIZE, page, page_count, report_dates, report_view, summary_counts
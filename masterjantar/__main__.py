@@ -0,0 +1,5 @@
+import sys
+
+from masterjantar.batch import main
+
+sys.exit(main())
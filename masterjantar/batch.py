@@ -0,0 +1,211 @@
+"""Headless batch reconciliation of many MasterTeam / Jantar / PN export triplets.
+
+Each triplet is a directory holding one export of each kind, recognised by
+its file name (see DEFAULT_PATTERNS). Usage:
+
+    python -m masterjantar exports/2024-*/ --output reports --workers 4
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+import pandas as pd
+
+from masterjantar.instrument import recording
+from masterjantar.output import FORMATS, write_table, write_workbook
+from masterjantar.periods import reconcile_periods
+from masterjantar.report import REPORTS, reconcile_files
+from masterjantar.rules import HOURS_TOLERANCE
+from masterjantar.store import MonthStore
+
+# File name patterns (case-insensitive) that identify each export inside a triplet directory
+DEFAULT_PATTERNS = {
+    "masterteam": "*masterteam*",
+    "jantar": "*jantar*",
+    "pn": "*pn*",
+}
+EXCEL_SUFFIXES = (".xls", ".xlsx")
+
+# --streaming choice -> loaders' streaming argument
+STREAMING_MODES = {"auto": None, "on": True, "off": False}
+
+COUNT_COLUMNS = [*REPORTS, "unmatched_names", "name_clashes"]
+SUMMARY_COLUMNS = ["triplet", "period", "status", *COUNT_COLUMNS, "seconds", "report", "error",
+                   *DEFAULT_PATTERNS]
+
+
+def triplet_names(directories):
+    """A unique name per directory: its base name, or its path below the directories'
+    common parent when two base names are the same (deptA/2024-03, deptB/2024-03)."""
+    names = [os.path.basename(d) for d in directories]
+    if len(set(names)) == len(names):
+        return names
+    directories = [os.path.abspath(d) for d in directories]
+    common = os.path.commonpath(directories)
+    if common in directories:
+        common = os.path.dirname(common)
+    return [os.path.relpath(d, common) for d in directories]
+
+
+def find_triplets(paths, patterns=DEFAULT_PATTERNS, multiple=False):
+    """Resolve directories or globs of directories into (name, {kind: file}) triplets.
+
+    With multiple=True a directory may hold several exports of each kind
+    (e.g. one per month) and every kind maps to a list of files. Names are
+    unique (see triplet_names); they name the reports and the store scope.
+    """
+    directories = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) or [path]
+        directories.extend(m for m in matches if os.path.isdir(m))
+    directories = list(dict.fromkeys(os.path.normpath(d) for d in directories))
+
+    triplets = []
+    for directory, name in zip(directories, triplet_names(directories)):
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith(EXCEL_SUFFIXES))
+        triplet = {}
+        for kind, pattern in patterns.items():
+            found = [f for f in files if fnmatch.fnmatch(f.lower(), pattern.lower())]
+            if not found or (len(found) > 1 and not multiple):
+                raise ValueError(f"{directory}: expected one {kind} export matching {pattern!r}, found {len(found)}")
+            paths_found = [os.path.join(directory, f) for f in found]
+            triplet[kind] = paths_found if multiple else paths_found[0]
+        triplets.append((name, triplet))
+    return triplets
+
+
+def write_reports(reports, output_dir, name, fmt="xlsx"):
+    """Write the reconciliation reports and return where they went.
+
+    xlsx gives one workbook <name>.xlsx with a sheet per report; the other
+    formats give a directory <name>/ with one <report key> file per report.
+    A name with a path (deptA/2024-03) is written below its directories.
+    """
+    if fmt == "xlsx":
+        path = os.path.join(output_dir, f"{name}.xlsx")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_workbook({sheet_name: reports[key] for key, (sheet_name, _) in REPORTS.items()}, path)
+        return path
+    path = os.path.join(output_dir, name)
+    os.makedirs(path, exist_ok=True)
+    for key in REPORTS:
+        write_table(reports[key], os.path.join(path, key + FORMATS[fmt][0]), fmt)
+    return path
+
+
+def process_triplet(name, triplet, output_dir, streaming=None, fmt="xlsx", store_path=None, periods=None,
+                    hours_tolerance=HOURS_TOLERANCE, record_stages=False, suggest_names=False):
+    """Reconcile one triplet and write its report; errors are recorded, not raised.
+
+    With store_path the triplet's months are kept in that MonthStore under the
+    triplet name, so a re-run only re-checks the days that changed. With
+    periods the triplet holds lists of exports, reconciled month by month
+    over the selected periods (see periods.select_periods). With
+    record_stages the summary's "stages" lists the measured pipeline stages.
+    suggest_names adds the closest MasterTeam name to every name MasterTeam
+    does not have, which is slow on large exports.
+    """
+    started = time.perf_counter()
+    summary = {"triplet": name, **{kind: ";".join(files) if isinstance(files, list) else files
+                                   for kind, files in triplet.items()}}
+    with recording(memory=True) if record_stages else nullcontext() as log:
+        try:
+            store = MonthStore(store_path) if store_path else None
+            if periods is not None:
+                reports = reconcile_periods(triplet["masterteam"], triplet["jantar"], triplet["pn"], periods,
+                                            streaming, store, scope=name, hours_tolerance=hours_tolerance,
+                                            suggest_names=suggest_names)
+            else:
+                # Triplets already run side by side, one per worker process
+                reports = reconcile_files(triplet["masterteam"], triplet["jantar"], triplet["pn"], streaming,
+                                          store, scope=name, hours_tolerance=hours_tolerance, concurrent=False,
+                                          suggest_names=suggest_names)
+            path = write_reports(reports, output_dir, name, fmt)
+            summary.update({
+                "period": str(reports["period"]),
+                **{key: len(reports[key]) for key in REPORTS},
+                "unmatched_names": len(reports["unmatched_names"]),
+                "name_clashes": len(reports["name_clashes"]),
+                "report": path,
+                "status": "ok",
+            })
+        except Exception as e:
+            summary.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    if record_stages:
+        summary["stages"] = log.records
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def run_batch(triplets, output_dir, workers=None, streaming=None, fmt="xlsx", store_path=None, periods=None,
+              hours_tolerance=HOURS_TOLERANCE, stage_log=None, suggest_names=False):
+    """Process triplets across a process pool and write summary.csv; returns the summary frame.
+
+    With stage_log, the measured stages of every triplet are appended to that
+    file as JSON lines.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_triplet, name, triplet, output_dir, streaming, fmt, store_path,
+                               periods, hours_tolerance, stage_log is not None, suggest_names)
+                   for name, triplet in triplets]
+        for future in as_completed(futures):
+            summary = future.result()
+            print(f"{summary['triplet']}: {summary['status']} ({summary['seconds']} s)", file=sys.stderr)
+            stages = summary.pop("stages", None)
+            if stages is not None:
+                with open(stage_log, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps({"triplet": summary["triplet"], **record}, ensure_ascii=False) + "\n"
+                                 for record in stages)
+            results.append(summary)
+
+    summary = pd.DataFrame(results).reindex(columns=SUMMARY_COLUMNS)
+    summary[COUNT_COLUMNS] = summary[COUNT_COLUMNS].astype("Int64")
+    summary = summary.sort_values("triplet").reset_index(drop=True)
+    summary.to_csv(os.path.join(output_dir, "summary.csv"), index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m masterjantar", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="triplet directories or globs of directories")
+    parser.add_argument("-o", "--output", default="reports", help="directory for the reports and summary.csv")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--streaming", choices=STREAMING_MODES, default="auto",
+                        help="read the exports row by row in chunks (auto: only large files)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="xlsx",
+                        help="report format; parquet and arrow need pyarrow (default: xlsx)")
+    parser.add_argument("--store", default=None, metavar="PATH",
+                        help="SQLite month store; re-runs only re-check the days that changed")
+    parser.add_argument("--periods", default=None, metavar="SPEC",
+                        help="directories hold exports for several months; reconcile the months in SPEC "
+                             "(all, 2024, 2024-Q1, 2024-03, 2024-01:2024-06 or ytd) one at a time")
+    parser.add_argument("--stage-log", default=None, metavar="PATH",
+                        help="append the time, rows and peak memory of every pipeline stage to PATH as JSON lines")
+    parser.add_argument("--hours-tolerance", type=float, default=HOURS_TOLERANCE, metavar="HOURS",
+                        help=f"largest difference between Jantar's clocked hours and MasterTeam's hours "
+                             f"that is not reported (default: {HOURS_TOLERANCE})")
+    parser.add_argument("--suggest-names", action="store_true",
+                        help="suggest the closest MasterTeam name for names MasterTeam does not have (slower)")
+    for kind, pattern in DEFAULT_PATTERNS.items():
+        parser.add_argument(f"--{kind}-pattern", default=pattern, help=f"{kind} file name pattern (default: {pattern})")
+    args = parser.parse_args(argv)
+
+    patterns = {kind: getattr(args, f"{kind}_pattern") for kind in DEFAULT_PATTERNS}
+    try:
+        triplets = find_triplets(args.paths, patterns, multiple=args.periods is not None)
+    except ValueError as e:
+        parser.error(str(e))
+    if not triplets:
+        parser.error("no triplet directories found")
+
+    summary = run_batch(triplets, args.output, args.workers, STREAMING_MODES[args.streaming], args.format,
+                        args.store, args.periods, args.hours_tolerance, args.stage_log, args.suggest_names)
+    return 0 if (summary["status"] == "ok").all() else 1
@@ -0,0 +1,161 @@
+"""Time and peak memory of each pipeline stage on synthetic exports.
+
+The exports are written by masterjantar.synthetic once per headcount and
+kept in --data. Usage:
+
+    python -m masterjantar.benchmark --save baseline.json
+    python -m masterjantar.benchmark --sizes 100 1000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from masterjantar import synthetic
+from masterjantar.batch import STREAMING_MODES
+from masterjantar.cache import PARSER_VERSION, parse_cache
+from masterjantar.ingest import pandas_engine
+from masterjantar.loaders import load_jantar, load_masterteam, load_pn, read_bytes
+from masterjantar.report import reconcile
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 50_000]
+DEFAULT_PERIOD = "2024-03"
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "masterjantar-benchmark")
+
+# A stage is reported as a regression when it is this much slower or larger than the
+# baseline; differences under NOISE_SECONDS / NOISE_MB are timer and allocator noise
+REGRESSION_THRESHOLD = 0.2
+NOISE_SECONDS = 0.05
+NOISE_MB = 1.0
+
+RESULT_COLUMNS = ["employees", "stage", "rows", "seconds", "peak_mb"]
+
+
+def exports(employees, period=DEFAULT_PERIOD, data_dir=DEFAULT_DATA_DIR):
+    """The synthetic exports for a headcount as {kind: bytes}, generated on first use."""
+    directory = os.path.join(data_dir, f"{period}-{employees}-v{synthetic.VERSION}")
+    paths = {kind: os.path.join(directory, f"{kind}.xlsx") for kind in ("masterteam", "jantar", "pn")}
+    if not all(os.path.exists(path) for path in paths.values()):
+        paths = synthetic.generate(directory, employees, period)
+    return {kind: read_bytes(path) for kind, path in paths.items()}
+
+
+def stages(files, streaming=None):
+    """(name, run, rows) of each stage in pipeline order.
+
+    run takes the earlier stages' results; rows counts the rows it produced.
+    """
+    return [
+        ("masterteam", lambda results: load_masterteam(files["masterteam"], streaming),
+         lambda result: len(result[1])),
+        ("jantar", lambda results: load_jantar(files["jantar"], streaming), lambda result: len(result.days)),
+        ("pn", lambda results: load_pn(files["pn"], streaming), len),
+        # reconcile() converts Jantar's dates and adds person ids in place, so re-runs do the same work
+        ("reconcile", lambda results: reconcile(*results["masterteam"], results["jantar"], results["pn"]),
+         lambda result: len(result["merged"])),
+    ]
+
+
+def _measure(run, results, repeat):
+    # Best wall time of repeat runs, then one more run under tracemalloc for
+    # the peak (tracing slows the code down, so it is not timed)
+    seconds = float("inf")
+    for _ in range(repeat):
+        parse_cache.clear()
+        start = time.perf_counter()
+        result = run(results)
+        seconds = min(seconds, time.perf_counter() - start)
+    parse_cache.clear()
+    tracemalloc.start()
+    try:
+        run(results)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, period=DEFAULT_PERIOD, data_dir=DEFAULT_DATA_DIR, repeat=3, streaming=None,
+                  log=print):
+    """Time and peak memory (MB) of every stage at every headcount, as a frame of RESULT_COLUMNS."""
+    rows = []
+    for employees in sizes:
+        files = exports(employees, period, data_dir)
+        results = {}
+        for stage, run, count in stages(files, streaming):
+            results[stage], seconds, peak_mb = _measure(run, results, repeat)
+            rows.append({"employees": employees, "stage": stage, "rows": count(results[stage]),
+                         "seconds": seconds, "peak_mb": peak_mb})
+            log(f"{employees:>7} {stage:<11} {rows[-1]['rows']:>10} rows {seconds:9.3f} s {peak_mb:9.1f} MB")
+            # A parser that drops people would make the later stages measure a smaller headcount
+            expected = employees * pd.Period(period, freq="M").days_in_month
+            if stage == "masterteam" and rows[-1]["rows"] != expected:
+                raise ValueError(f"MasterTeam gave {rows[-1]['rows']} person-days for {employees} employees, "
+                                 f"expected {expected}")
+    parse_cache.clear()
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def save_baseline(results, path):
+    """Write the results, with the versions they were measured with, as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "parser_version": PARSER_VERSION,
+            "pandas": pd.__version__,
+            "engine": pandas_engine(),
+            "python": platform.python_version(),
+            "results": results.to_dict("records"),
+        }, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f)["results"], columns=RESULT_COLUMNS)
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """The results next to the baseline, with time and memory ratios and a regression flag per stage."""
+    merged = results.merge(baseline.drop(columns="rows"), on=["employees", "stage"], how="left",
+                           suffixes=("", "_baseline"))
+    merged["time_ratio"] = (merged["seconds"] / merged["seconds_baseline"]).round(2)
+    merged["memory_ratio"] = (merged["peak_mb"] / merged["peak_mb_baseline"]).round(2)
+    slower = (merged["time_ratio"] > 1 + threshold) & (merged["seconds"] - merged["seconds_baseline"] > NOISE_SECONDS)
+    larger = (merged["memory_ratio"] > 1 + threshold) & (merged["peak_mb"] - merged["peak_mb_baseline"] > NOISE_MB)
+    merged["regression"] = slower | larger
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m masterjantar.benchmark", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="N",
+                        help=f"headcounts to measure (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("-p", "--period", default=DEFAULT_PERIOD, help=f"month as YYYY-MM (default: {DEFAULT_PERIOD})")
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, metavar="DIR",
+                        help="where the synthetic exports are generated and reused")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per stage; the best counts (default: 3)")
+    parser.add_argument("--streaming", choices=STREAMING_MODES, default="auto",
+                        help="read the exports row by row in chunks (auto: only large files)")
+    parser.add_argument("--save", default=None, metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", default=None, metavar="PATH",
+                        help="compare with a baseline; exits with 1 if a stage regressed")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed slowdown or growth before a regression is reported (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.sizes, args.period, args.data, args.repeat, STREAMING_MODES[args.streaming])
+    if args.save:
+        save_baseline(results, args.save)
+    if args.compare:
+        comparison = compare(results, load_baseline(args.compare), args.threshold)
+        print(comparison.to_string(index=False))
+        return 1 if comparison["regression"].any() else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
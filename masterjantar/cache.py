@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bump whenever a parser's output changes so stale cached frames are not reused
+PARSER_VERSION = 4
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _copy(result):
+    if isinstance(result, tuple):
+        return tuple(_copy(item) for item in result)
+    if hasattr(result, "copy"):
+        return result.copy()
+    return result
+
+
+class ParseCache:
+    """Bounded LRU cache of parsed frames keyed by the hash of the uploaded bytes.
+
+    get_or_compute takes any hashable key, for results derived from several inputs.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, data):
+        return kind, digest(data), PARSER_VERSION
+
+    def get_or_parse(self, kind, data, parse):
+        return self.get_or_compute(self.key(kind, data), parse)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return _copy(self._entries[key])
+
+        result = compute()
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        # Callers get their own copy so adding columns never touches the cached frame
+        return _copy(result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+
+# Shared by every button and rerun in the process (Streamlit keeps imported modules alive)
+parse_cache = ParseCache()
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from masterjantar.jantar import open_sessions, worked_hours
+from masterjantar.persons import PersonIndex, assign_person_ids
+from masterjantar.rules import HOURS_TOLERANCE, RULES
+
+# Column names of the reports built from the grid
+REPORT_COLUMNS = ["PREZIME i IME", "Full_Date", "Konto", "MasterTeam", "Jantar"]
+# The discrepancy table adds the title of the rule that flagged the day
+DISCREPANCY_COLUMNS = ["Provjera", *REPORT_COLUMNS]
+
+
+def _day_index(dates, start):
+    # Zero-based day of the month for every date, -1 where the date is missing
+    days = (pd.DatetimeIndex(dates) - start).days
+    return np.asarray(pd.Series(days).fillna(-1), dtype=np.int64)
+
+
+def _first_per_cell(person, day, values, shape):
+    # Keep the first value seen for every (person, day) cell; cells outside the month are dropped
+    grid = np.full(shape, np.nan, dtype=object)
+    filled = np.zeros(shape, dtype=bool)
+    valid = (person >= 0) & (day >= 0) & (day < shape[1])
+    cells, first = np.unique(person[valid].astype(np.int64) * shape[1] + day[valid], return_index=True)
+    grid.flat[cells] = np.asarray(values, dtype=object)[valid][first]
+    filled.flat[cells] = True
+    return grid, filled
+
+
+def _sum_per_cell(person, day, values, shape):
+    # Total of the values in every (person, day) cell; NaN where a cell has none
+    valid = (person >= 0) & (day >= 0) & (day < shape[1]) & ~np.isnan(values)
+    cells = person[valid].astype(np.int64) * shape[1] + day[valid]
+    total = np.bincount(cells, weights=values[valid], minlength=shape[0] * shape[1])
+    count = np.bincount(cells, minlength=shape[0] * shape[1])
+    return np.where(count > 0, total, np.nan).reshape(shape)
+
+
+class MonthGrid:
+    """Aligned persons × days arrays of the MasterTeam, Jantar and PN data for one month.
+
+    Row i belongs to person id i and column d to day d + 1 of the period, so every
+    report is an elementwise mask and its cost depends on headcount × 31 only.
+    """
+
+    def __init__(self, period, persons, masterteam, in_masterteam, jantar, pn, in_pn, last_jantar_date,
+                 worked_hours=None, hours_tolerance=HOURS_TOLERANCE):
+        self.period = period
+        self.persons = persons
+        self.masterteam = masterteam
+        self.in_masterteam = in_masterteam
+        self.jantar = jantar
+        self.pn = pn
+        self.in_pn = in_pn
+        self.last_jantar_date = last_jantar_date
+        # Hours worked per day by Jantar's clock times (NaN without them)
+        self.worked_hours = np.full(masterteam.shape, np.nan) if worked_hours is None else worked_hours
+        self.hours_tolerance = hours_tolerance
+
+        # Coerce the MasterTeam values once; non-numeric entries (e.g. "GO") become NaN
+        self.masterteam_numeric = pd.to_numeric(
+            pd.Series(masterteam.ravel()), errors='coerce').to_numpy(dtype=float).reshape(masterteam.shape)
+
+        # Inputs shared by the rules (see rules.py)
+        self.has_hours = ~np.isnan(self.masterteam_numeric)
+        self.jantar_absent = pd.isna(jantar) | (jantar == 'Odsutan')
+        self.jantar_present = ~self.jantar_absent & (jantar != 'Vikend')
+
+    @classmethod
+    def from_frames(cls, period, melted_master, df_J_cleaned, df_expanded, persons=None,
+                    hours_tolerance=HOURS_TOLERANCE):
+        """Build the grid from the parsed MasterTeam, Jantar (Datum as datetime) and PN frames.
+
+        The frames are joined on their integer person_id; when no PersonIndex is
+        given one is built here and the ids are added to the frames.
+        """
+        if persons is None:
+            persons = PersonIndex.from_frames(melted_master, df_J_cleaned, df_expanded)
+            assign_person_ids(persons, melted_master, df_J_cleaned, df_expanded)
+        shape = (len(persons), period.days_in_month)
+        start = period.start_time
+
+        masterteam, in_masterteam = _first_per_cell(
+            melted_master["person_id"].to_numpy(),
+            melted_master["Day"].astype(int).to_numpy() - 1,
+            melted_master["Value"].to_numpy(dtype=object), shape)
+
+        # Days with several Jantar sessions take the first non-empty Statistika
+        recorded = df_J_cleaned[df_J_cleaned["Statistika"].notna()]
+        jantar, _ = _first_per_cell(
+            recorded["person_id"].to_numpy(),
+            _day_index(recorded["Datum"], start),
+            recorded["Statistika"].to_numpy(dtype=object), shape)
+
+        # Days with several Jantar sessions add up the hours of every session;
+        # a day with a session still open has no total yet
+        person, day = df_J_cleaned["person_id"].to_numpy(), _day_index(df_J_cleaned["Datum"], start)
+        hours = _sum_per_cell(person, day, worked_hours(df_J_cleaned), shape)
+        hours[_sum_per_cell(person, day, open_sessions(df_J_cleaned).astype(float), shape) > 0] = np.nan
+
+        pn, in_pn = _first_per_cell(
+            df_expanded["person_id"].to_numpy(),
+            _day_index(df_expanded["Datum"], start),
+            df_expanded["Razlog odsutnosti"].to_numpy(dtype=object), shape)
+
+        return cls(period, persons, masterteam, in_masterteam, jantar, pn, in_pn,
+                   df_J_cleaned["Datum"].max(), hours, hours_tolerance)
+
+    @property
+    def dates(self):
+        return pd.date_range(self.period.start_time, periods=self.period.days_in_month)
+
+    @property
+    def checked_days(self):
+        # Only days Jantar has already reached can be reconciled
+        return np.asarray(self.dates <= self.last_jantar_date)[np.newaxis, :]
+
+    def _cells(self, persons, days, masterteam):
+        return pd.DataFrame({
+            "PREZIME i IME": self.persons.display_names(persons),
+            "Full_Date": self.dates[days],
+            "Konto": self.pn[persons, days],
+            "MasterTeam": masterteam,
+            "Jantar": self.jantar[persons, days],
+        }, columns=REPORT_COLUMNS)
+
+    def to_frame(self, mask, masterteam=None):
+        """List the masked cells day by day as rows of a report."""
+        days, persons = np.nonzero(mask.T)
+        if masterteam is None:
+            masterteam = self.masterteam
+        return self._cells(persons, days, masterteam[persons, days])
+
+    def evaluate(self, rules=RULES):
+        """The mask of every rule, {rule key: persons × days mask}."""
+        return {key: rule.predicate(self) & self.checked_days if rule.cut_off else rule.predicate(self)
+                for key, rule in rules.items()}
+
+    def rule_report(self, key, rules=RULES, mask=None):
+        """The days one rule flags, as a report (with the rule's detail columns, if any).
+
+        mask is the rule's mask from evaluate(), when the rules were already evaluated.
+        """
+        rule = rules[key]
+        if mask is None:
+            mask = self.evaluate({key: rule})[key]
+        frame = self.to_frame(mask, self.masterteam_numeric if rule.numeric else None)
+        if rule.details is not None:
+            days, persons = np.nonzero(mask.T)
+            for column, values in rule.details.items():
+                frame[column] = values(self)[persons, days]
+        return frame
+
+    def discrepancies(self, rules=RULES, masks=None):
+        """Every day flagged by any rule, tagged with the rule's title (day, person, rule order).
+
+        masks are the rules' masks from evaluate(), when they were already evaluated.
+        """
+        if masks is None:
+            masks = self.evaluate(rules)
+        titles = np.array([rule.title for rule in rules.values()], dtype=object)
+        numeric = np.array([rule.numeric for rule in rules.values()], dtype=bool)
+        flagged = np.stack([masks[key] for key in rules])
+        days, persons, rule = np.nonzero(flagged.transpose(2, 1, 0))
+        masterteam = np.where(numeric[rule], self.masterteam_numeric[persons, days].astype(object),
+                              self.masterteam[persons, days])
+        frame = self._cells(persons, days, masterteam)
+        frame.insert(0, "Provjera", titles[rule])
+        return frame
+
+    def merged_report(self):
+        """Every person-day known to MasterTeam or to a travel order."""
+        return self.to_frame(self.in_masterteam | self.in_pn)
+
+    def absent_per_jantar(self):
+        """1. Odsutni prema Jantaru: hours in MasterTeam, but absent or missing in Jantar and no travel order."""
+        return self.rule_report("absent_per_jantar")
+
+    def absent_per_masterteam(self):
+        """1. Odsutni prema MasterTeam: present in Jantar, but no hours in MasterTeam."""
+        return self.rule_report("absent_per_masterteam")
+
+    def hours_mismatch(self):
+        """2. Razlika u satima: Jantar's clocked hours differ from MasterTeam's by more than the tolerance."""
+        return self.rule_report("hours_mismatch")
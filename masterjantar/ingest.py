@@ -0,0 +1,151 @@
+"""Low-level Excel reading: engine selection and row-by-row streaming of the first sheet."""
+import datetime
+import importlib.util
+from io import BytesIO
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from masterjantar.instrument import stage
+
+# Leading bytes of a legacy .xls (OLE2) workbook
+XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+
+
+def pandas_engine():
+    """The fastest pd.read_excel engine installed (None lets pandas pick openpyxl/xlrd)."""
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return None
+
+
+def is_xls(data):
+    """Whether the bytes are a legacy .xls workbook, whose reader (xlrd) always
+    loads the whole sheet, even to look at its top rows."""
+    return data.startswith(XLS_MAGIC)
+
+
+def read_excel(data, **kwargs):
+    """pd.read_excel over raw workbook bytes with the preferred engine."""
+    return pd.read_excel(BytesIO(data), engine=pandas_engine(), **kwargs)
+
+
+def read_sheet(data, source, **kwargs):
+    """read_excel measured as the "read" stage of one export (the decoding of a whole-file read)."""
+    with stage("read", source=source) as s:
+        frame = read_excel(data, **kwargs)
+        s["rows"] = len(frame)
+    return frame
+
+
+def _convert_cell(value):
+    # Match the values pd.read_excel produces: integral floats become ints
+    # and bare dates become timestamps
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return pd.Timestamp(value)
+    return value
+
+
+def _iter_openpyxl(data):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # Some exporters write a wrong sheet dimension; read every row to its real end
+        sheet.reset_dimensions()
+        for row in sheet.iter_rows(values_only=True):
+            yield [_convert_cell(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _iter_xlrd(data):
+    import xlrd
+
+    workbook = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for i in range(sheet.nrows):
+            row = []
+            for cell in sheet.row(i):
+                if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    row.append(None)
+                elif cell.ctype == xlrd.XL_CELL_DATE:
+                    row.append(xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode))
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    row.append(bool(cell.value))
+                else:
+                    row.append(_convert_cell(cell.value))
+            yield row
+    finally:
+        workbook.release_resources()
+
+
+def iter_rows(data):
+    """Yield the rows of the first sheet one at a time as lists (None for empty cells).
+
+    .xlsx files go through openpyxl's read-only reader, which never holds the
+    whole sheet in memory; legacy .xls files are read with xlrd.
+    """
+    if is_xls(data):
+        return _iter_xlrd(data)
+    return _iter_openpyxl(data)
+
+
+def sheet_rows(frame):
+    """Yield the rows of a sheet read with header=None as iter_rows does (None for empty cells)."""
+    for row in frame.itertuples(index=False, name=None):
+        yield [None if pd.isna(value) else value for value in row]
+
+
+def table_below(sheet, header_row, positions, names):
+    """The rows of a sheet read with header=None below its header row, at the given
+    column positions (padded where the sheet is narrower) and under the given names."""
+    table = sheet.iloc[header_row + 1:].reindex(columns=list(positions)).reset_index(drop=True)
+    table.columns = names
+    return table
+
+
+def iter_chunks(rows, chunksize):
+    """Group a row iterator into lists of at most chunksize rows."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunksize)):
+        yield chunk
+
+
+def header_names(values):
+    """Name columns the way pd.read_excel(header=...) does: blanks become
+    "Unnamed: i" and repeated names get a ".1", ".2", ... suffix."""
+    names, seen = [], {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or pd.isna(value) else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def frame_from_rows(rows, columns=None, positions=None, infer=True):
+    """Build a frame from ragged row lists.
+
+    positions selects (and pads) the cell positions to keep; columns names them
+    and, without positions, pads or cuts the rows to fit. infer=False leaves
+    every column as object, like reading with dtype=object.
+    """
+    frame = pd.DataFrame(rows, dtype=object)
+    if positions is None and columns is not None:
+        positions = range(len(columns))
+    if positions is not None:
+        frame = frame.reindex(columns=positions)
+    if columns is not None:
+        frame.columns = columns
+    # Empty cells are NaN as in pd.read_excel, so all-empty columns become float
+    frame = frame.mask(frame.isna(), np.nan)
+    return frame.infer_objects() if infer else frame
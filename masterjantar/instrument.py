@@ -0,0 +1,99 @@
+"""Wall time, row counts and peak memory of the pipeline stages of one run.
+
+Stages are marked in the code with `with stage("parse", source="jantar") as s:`
+and only measured inside `with recording() as log:`; otherwise stage() does
+nothing, so runs are silent by default.
+"""
+import contextvars
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+STAGE_COLUMNS = ["stage", "source", "rows", "seconds", "peak_mb", "level"]
+
+_current = contextvars.ContextVar("stage_log", default=None)
+
+
+class StageLog:
+    """The stages measured during one recording, in the order they started.
+
+    Peak memory (MB above the memory in use when the stage started) is only
+    measured with memory=True, through tracemalloc, which slows the run down.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self._open = []
+
+    @contextmanager
+    def stage(self, name, **fields):
+        record = {"stage": name, **fields, "level": len(self._open)}
+        self.records.append(record)
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak so far belongs to the enclosing stage; start a new one for this stage
+            if self._open:
+                self._open[-1]["_peak"] = max(self._open[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_start"] = record["_peak"] = current
+        self._open.append(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            self._open.pop()
+            if self.memory:
+                peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                record["peak_mb"] = round((peak - record.pop("_start")) / 2**20, 2)
+                if self._open:
+                    self._open[-1]["_peak"] = max(self._open[-1]["_peak"], peak)
+
+    def extend(self, records):
+        """Add stages measured elsewhere (e.g. in a worker process) under the open stage."""
+        self.records.extend({**record, "level": record["level"] + len(self._open)} for record in records)
+
+    def to_frame(self):
+        frame = pd.DataFrame(self.records)
+        columns = [*STAGE_COLUMNS, *(c for c in frame.columns if c not in STAGE_COLUMNS)]
+        frame = frame.reindex(columns=columns)
+        # Counts are missing for stages that do not produce rows
+        for column in ("rows", "bytes"):
+            if column in frame:
+                frame[column] = frame[column].astype("Int64")
+        return frame
+
+
+@contextmanager
+def recording(memory=False):
+    """Measure the stages run inside the block; yields the StageLog."""
+    log = StageLog(memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def current_log():
+    """The StageLog of the active recording, or None."""
+    return _current.get()
+
+
+@contextmanager
+def stage(name, **fields):
+    """Measure a stage when a recording is active; yields a dict for extra fields such as "rows"."""
+    log = current_log()
+    if log is None:
+        yield {}
+        return
+    with log.stage(name, **fields) as record:
+        yield record
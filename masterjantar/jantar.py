@@ -0,0 +1,304 @@
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from masterjantar.ingest import frame_from_rows
+from masterjantar.layout import Layout, read_head, resolve_layout
+from masterjantar.schemas import JANTAR_COLUMN_COUNT
+
+# Rows whose first column names one of these fields carry per-employee metadata in the second column
+METADATA_FIELDS = [
+    "Korisnik", "Razdoblje", "Odjel", "Raspored", "Kartica korisnika",
+    "Suma", "Saldo za razdoblje", "Radna obveza",
+    "Prekovremeno", "Stimulacija", "Stanje", "Prijenos", "Godišnji", "Stari godišnji",
+    "Dvokratni rad", "Broj obroka", "Broj prijevoza",
+]
+
+# Header and summary rows that are not part of the daily data
+SKIPPED_MARKERS = ["Statistika", "Vrijeme", "Ukupno", "Vremenski razrez", ""]
+
+# Names given to the first eight columns of every daily row
+DAY_FIELDS = ["Dan", "Datum", "Početak", "Unnamed 1", "Kraj", "Unnamed 2", "Ukupno", "Statistika"]
+
+# Low-cardinality columns stored as categoricals
+CATEGORICAL_SECTION_FIELDS = ["Odjel", "Raspored"]
+CATEGORICAL_DAY_FIELDS = ["Dan", "Statistika"]
+
+
+def clock_hours(values):
+    """Hour of the day (7.5 for 07:30) of clock times given as "7:30", "07:30:00",
+    times, datetimes or Excel day fractions; NaN where there is no time."""
+    # A clock has few distinct readings; parse each once and map them back
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    uniques = pd.Series(uniques, dtype=object)
+    text = uniques.astype(str)
+    parts = text.str.extract(r"(?:^|\s)(\d{1,2}):(\d{2})(?::(\d{2}))?").astype(float)
+    hours = parts[0] + parts[1] / 60 + parts[2].fillna(0) / 3600
+    # Cells Excel returned as a plain number are a fraction of a day
+    fraction = pd.to_numeric(uniques.where(~text.str.contains(":", regex=False)), errors="coerce")
+    hours = hours.fillna(fraction.where((fraction >= 0) & (fraction <= 1)) * 24)
+    # Missing values are factorized to code -1, which picks the trailing NaN
+    return np.append(hours.to_numpy(dtype=float), np.nan)[codes]
+
+
+def worked_hours(days):
+    """Hours worked in each daily row (one session), from its Početak and Kraj.
+
+    A session that ends before it starts runs past midnight.
+    """
+    duration = clock_hours(days["Kraj"]) - clock_hours(days["Početak"])
+    return np.where(duration < 0, duration + 24, duration)
+
+
+def open_sessions(days):
+    """Daily rows with only one of Početak and Kraj, e.g. someone still clocked in
+    on the last day of the export. The hours of their day are not known yet."""
+    return np.isnan(clock_hours(days["Početak"])) != np.isnan(clock_hours(days["Kraj"]))
+
+
+def _last_position(mask):
+    # Position of the last True at or before each row (NaN before the first one)
+    positions = np.where(mask, np.arange(len(mask)), np.nan)
+    return pd.Series(positions).ffill().to_numpy()
+
+
+class JantarExport:
+    """A parsed Jantar export stored as two linked tables.
+
+    ``sections`` holds one row per employee section with its metadata (Korisnik,
+    Razdoblje, Odjel, Suma, ...). ``days`` holds the daily rows with only a
+    ``section_id`` pointing into ``sections``, so the metadata is not repeated
+    on every day. ``to_wide()`` rebuilds the original one-table layout.
+    """
+
+    def __init__(self, sections, days, wide_columns):
+        self.sections = sections
+        self.days = days
+        self.wide_columns = wide_columns
+
+    def copy(self):
+        return JantarExport(self.sections.copy(), self.days.copy(), list(self.wide_columns))
+
+    def daily(self, section_columns):
+        """The daily rows with the given section columns attached."""
+        section_id = self.days["section_id"].to_numpy()
+        return self.days.assign(**{
+            column: self.sections[column].to_numpy()[section_id] for column in section_columns
+        })
+
+    def in_period(self, period):
+        """The export with only the daily rows dated within a monthly period."""
+        datum = pd.to_datetime(self.days["Datum"], dayfirst=True)
+        keep = (datum.dt.to_period("M") == period).to_numpy()
+        days = self.days[keep].assign(Datum=datum[keep]).reset_index(drop=True)
+        return JantarExport(self.sections, days, list(self.wide_columns))
+
+    def to_wide(self):
+        """One row per employee day with the section metadata repeated on each row."""
+        section_id = self.days["section_id"].to_numpy()
+        data = {}
+        for column in self.wide_columns:
+            if column in self.days:
+                data[column] = self.days[column].to_numpy(dtype=object)
+            else:
+                data[column] = self.sections[column].to_numpy(dtype=object)[section_id]
+        return pd.DataFrame(data, columns=self.wide_columns).infer_objects()
+
+
+def parse_jantar_sections(df_J):
+    """Parse a raw Jantar export (read with header=None) into a JantarExport."""
+    df_J = df_J.reset_index(drop=True)
+    empty = pd.Series(None, index=df_J.index, dtype=object)
+    columns = [df_J.iloc[:, i] if i < df_J.shape[1] else empty for i in range(len(DAY_FIELDS))]
+
+    first_col = columns[0].astype(str).str.strip()
+    second_col = columns[1].to_numpy(dtype=object)
+
+    # Classify every row at once instead of walking the sheet row by row
+    is_metadata = first_col.isin(METADATA_FIELDS).to_numpy()
+    is_skipped = ~is_metadata & (
+        first_col.isin(SKIPPED_MARKERS)
+        | columns[4].isin(["Vremenski razrez", "Vrijeme"])
+        | (columns[5] == "Ukupno")
+    ).to_numpy()
+    is_header = ~is_metadata & ~is_skipped & (first_col == "Dan").to_numpy()
+    is_blank = np.logical_and.reduce([col.isna().to_numpy() for col in columns])
+
+    # Every "Dan" header opens a section that snapshots the metadata seen so far
+    header_position = _last_position(is_header)
+    opened = ~np.isnan(header_position)
+
+    # For each metadata field, the row that last set it as of each section header
+    field_positions = {}
+    for field in METADATA_FIELDS:
+        assigned = _last_position(is_metadata & (first_col == field).to_numpy())
+        section_assigned = np.full(len(df_J), np.nan)
+        section_assigned[opened] = assigned[header_position[opened].astype(int)]
+        field_positions[field] = section_assigned
+
+    has_metadata = np.logical_or.reduce([~np.isnan(p) for p in field_positions.values()])
+    is_data = ~is_metadata & ~is_skipped & ~is_header & ~is_blank & has_metadata
+    rows = np.flatnonzero(is_data)
+
+    # One section per "Dan" header that has daily rows
+    section_headers, section_id = np.unique(header_position[rows], return_inverse=True)
+    section_rows = np.searchsorted(rows, section_headers)
+
+    sections = {}
+    first_assigned = {}
+    for field, positions in field_positions.items():
+        positions = positions[rows][section_rows]
+        present = ~np.isnan(positions)
+        if not present.any():
+            continue
+        values = np.full(len(section_headers), np.nan, dtype=object)
+        values[present] = second_col[positions[present].astype(int)]
+        sections[field] = values
+        first_assigned[field] = np.flatnonzero(is_metadata & (first_col == field).to_numpy())[0]
+
+    # Keep the column order a list of per-row dicts would produce: the first
+    # section's metadata, then the day fields, then fields that appear later
+    metadata_order = sorted(first_assigned, key=first_assigned.get)
+    if len(rows):
+        leading = [f for f in metadata_order if first_assigned[f] < section_headers[0]]
+    else:
+        leading = metadata_order
+    trailing = [f for f in metadata_order if f not in leading]
+
+    sections = pd.DataFrame(sections, columns=metadata_order).infer_objects()
+    sections.index.name = "section_id"
+    if 'Korisnik' in sections:
+        sections['Korisnik'] = sections['Korisnik'].str.strip().str.upper()
+
+    days = pd.DataFrame({"section_id": section_id.astype(np.int32)})
+    for field, col in zip(DAY_FIELDS, columns):
+        days[field] = col.to_numpy(dtype=object)[rows]
+    days = days.infer_objects()
+    days['Datum'] = days['Datum'].ffill()
+
+    for field in CATEGORICAL_SECTION_FIELDS:
+        if field in sections:
+            sections[field] = sections[field].astype("category")
+    for field in CATEGORICAL_DAY_FIELDS:
+        days[field] = days[field].astype("category")
+
+    return JantarExport(sections, days, leading + DAY_FIELDS + trailing)
+
+
+def parse_jantar(df_J):
+    """Turn a raw Jantar export (read with header=None) into one row per employee day."""
+    return parse_jantar_sections(df_J).to_wide()
+
+
+def read_periods(rows):
+    """The months an export covers, from its first Razdoblje row ("01.03.2024 - 31.03.2024").
+
+    Reading stops at that row, so only the top of the file is parsed. Returns
+    an empty list when there is no such row.
+    """
+    for row in rows:
+        if len(row) > 1 and str(row[0]).strip() == "Razdoblje":
+            # Only the month and year of the first and last date matter
+            dates = re.findall(r"\d{1,2}\.(\d{1,2})\.(\d{4})", str(row[1]))
+            if not dates:
+                break
+            start, end = (pd.Period(year=int(year), month=int(month), freq="M") for month, year in (dates[0], dates[-1]))
+            return list(pd.period_range(start, end, freq="M"))
+    return []
+
+
+def _is_section_header(row, offset=0):
+    # The same test parse_jantar_sections applies to a "Dan" header row,
+    # for a table starting offset columns in
+    first_col = str(row[offset]).strip() if len(row) > offset else ""
+    return (first_col == "Dan"
+            and not (len(row) > offset + 4 and row[offset + 4] in ("Vremenski razrez", "Vrijeme"))
+            and not (len(row) > offset + 5 and row[offset + 5] == "Ukupno"))
+
+
+# The whole sheet from its first column, for exports without a "Dan" header near the top
+DEFAULT_LAYOUT = Layout(None, range(JANTAR_COLUMN_COUNT), DAY_FIELDS)
+
+
+def detect_layout(head):
+    """Find the first "Dan" header row; the table is read from its column on."""
+    for header_row, row in enumerate(head):
+        for offset in range(len(row)):
+            if _is_section_header(row, offset):
+                return Layout(header_row, range(offset, offset + JANTAR_COLUMN_COUNT), DAY_FIELDS)
+    return None
+
+
+def read_layout(rows):
+    """The layout of a Jantar export and the top rows read to find it."""
+    head = read_head(rows)
+    return resolve_layout("jantar", head, detect_layout) or DEFAULT_LAYOUT, head
+
+
+def _update_metadata(metadata, chunk):
+    # Carry the last value of every metadata field set in this chunk, keeping
+    # the fields in the order they were first set
+    first_col = chunk.iloc[:, 0].astype(str).str.strip()
+    assignments = chunk[first_col.isin(METADATA_FIELDS).to_numpy()]
+    fields = first_col[assignments.index]
+    for field in fields.drop_duplicates():
+        metadata.setdefault(field, None)
+    last = assignments.iloc[:, 1].groupby(fields.to_numpy(), sort=False).nth(-1)
+    for field, value in zip(fields.loc[last.index], last):
+        metadata[field] = value
+
+
+def _concat_exports(exports):
+    sections, days, offset = [], [], 0
+    for export in exports:
+        sections.append(export.sections)
+        days.append(export.days.assign(section_id=export.days["section_id"] + offset))
+        offset += len(export.sections)
+
+    sections = pd.concat(sections, ignore_index=True).infer_objects()
+    sections.index.name = "section_id"
+    days = pd.concat(days, ignore_index=True).infer_objects()
+    days["section_id"] = days["section_id"].astype(np.int32)
+    days['Datum'] = days['Datum'].ffill()
+    for field in CATEGORICAL_SECTION_FIELDS:
+        if field in sections:
+            sections[field] = sections[field].astype("category")
+    for field in CATEGORICAL_DAY_FIELDS:
+        days[field] = days[field].astype("category")
+
+    # The first section decides which metadata columns precede the day fields
+    first = next((e for e in exports if len(e.days)), exports[0])
+    leading = first.wide_columns[:first.wide_columns.index(DAY_FIELDS[0])]
+    trailing = [c for c in sections.columns if c not in leading]
+    return JantarExport(sections, days, leading + DAY_FIELDS + trailing)
+
+
+def parse_jantar_stream(rows, chunksize):
+    """Like parse_jantar_sections, but over a row iterator (see ingest.iter_rows).
+
+    Chunks are cut just before a "Dan" header, so no section is split. The
+    metadata set so far is replayed at the top of the next chunk, which gives
+    every section the same metadata snapshot as a single pass would.
+    """
+    rows = iter(rows)
+    layout, head = read_layout(rows)
+    offset = layout.positions[0]
+    exports = []
+    metadata = {}
+    chunk = []
+
+    def flush():
+        replay = [[None] * offset + [field, value] for field, value in metadata.items()]
+        frame = frame_from_rows(replay + chunk, positions=layout.positions)
+        exports.append(parse_jantar_sections(frame))
+        _update_metadata(metadata, frame.iloc[len(replay):])
+
+    for row in chain(head, rows):
+        if len(chunk) >= chunksize and _is_section_header(row, offset):
+            flush()
+            chunk = []
+        chunk.append(row)
+    flush()
+    return _concat_exports(exports)
@@ -0,0 +1,94 @@
+"""Where the table sits in an export, detected once per export template.
+
+Each parser detects its layout (the header row, the column positions to read
+and marker cells such as MasterTeam's period) from the top rows of a file.
+The resolved layout is kept as a profile keyed by a fingerprint of the
+header row, so later files of the same template are matched by that
+fingerprint and read with the stored profile instead of being scanned again.
+A changed template (a new column, an extra title row) gets its own profile.
+"""
+import json
+import re
+import threading
+from collections import namedtuple
+from itertools import islice
+
+import pandas as pd
+
+from masterjantar.cache import digest
+from masterjantar.instrument import stage
+
+# Top rows of a file searched for the header
+HEAD_ROWS = 30
+
+# header_row: index of the header row; positions: the column positions to
+# read; names: their column names; period_cell: (row, column) of the period text
+Layout = namedtuple("Layout", ["header_row", "positions", "names", "period_cell"], defaults=[None])
+
+
+def read_head(rows):
+    """The top rows of a row iterator, as searched for the header."""
+    return list(islice(rows, HEAD_ROWS))
+
+
+def fingerprint(row):
+    """Identity of a header row's template.
+
+    Cells with digits (MasterTeam's "Po 1" day headers) are masked, so the
+    months of one template share a fingerprint per month length.
+    """
+    cells = ["" if value is None or pd.isna(value) else str(value).strip() for value in row]
+    cells = ["#" if re.search(r"\d", cell) else cell for cell in cells]
+    while cells and not cells[-1]:
+        cells.pop()
+    return digest(json.dumps(cells, ensure_ascii=False).encode())
+
+
+class LayoutProfiles:
+    """Resolved layouts by export kind, header row and header fingerprint, shared by the whole process."""
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, kind, head):
+        """The stored layout whose header row matches this file's, or None."""
+        with self._lock:
+            profiles = list(self._profiles.get(kind, {}).items())
+        for header_row, layouts in profiles:
+            if header_row < len(head):
+                layout = layouts.get(fingerprint(head[header_row]))
+                if layout is not None:
+                    return layout
+        return None
+
+    def add(self, kind, head, layout):
+        with self._lock:
+            layouts = self._profiles.setdefault(kind, {}).setdefault(layout.header_row, {})
+            layouts[fingerprint(head[layout.header_row])] = layout
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def __len__(self):
+        return sum(len(layouts) for profiles in self._profiles.values() for layouts in profiles.values())
+
+
+layout_profiles = LayoutProfiles()
+
+
+def resolve_layout(kind, head, detect):
+    """The layout of an export from its top rows: a stored profile, or detect(head) stored as a new one.
+
+    detect returns None when the top rows show no table; nothing is stored then.
+    """
+    with stage("layout", source=kind) as s:
+        layout = layout_profiles.lookup(kind, head)
+        s["profile"] = "stored"
+        if layout is None:
+            layout = detect(head)
+            if layout is not None:
+                layout_profiles.add(kind, head, layout)
+            s["profile"] = "detected"
+    return layout
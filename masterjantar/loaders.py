@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from masterjantar.cache import parse_cache
+from masterjantar.ingest import is_xls, iter_rows, pandas_engine, read_sheet, sheet_rows, table_below
+from masterjantar.instrument import current_log, recording, stage
+from masterjantar.jantar import parse_jantar_sections, parse_jantar_stream, read_layout as read_jantar_layout
+from masterjantar.masterteam import parse_masterteam_stream, read_masterteam
+from masterjantar.pn import expand_pn, expand_pn_stream, read_layout as read_pn_layout
+from masterjantar.schemas import PN_COLUMNS, PN_DTYPES
+
+# Uploads at least this large are read row by row in chunks instead of all at once.
+# Without calamine, whole-sheet reads (openpyxl) are no faster than the row stream
+# and take about four times its memory. calamine reads a whole sheet four to five
+# times faster than the stream but peaks near 50x the file size in memory, so with
+# it only very large exports are streamed
+STREAMING_THRESHOLD = 5 * 1024 * 1024
+CALAMINE_STREAMING_THRESHOLD = 50 * 1024 * 1024
+CHUNKSIZE = 10_000
+
+# Exports to parse adding up to at least this much are parsed in worker processes
+PROCESS_THRESHOLD = 1024 * 1024
+_pool = None
+
+
+def read_bytes(source):
+    """Return the raw bytes of an upload, a file path or a bytes object."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def streaming_threshold():
+    """The upload size from which streaming=None reads row by row."""
+    return CALAMINE_STREAMING_THRESHOLD if pandas_engine() == "calamine" else STREAMING_THRESHOLD
+
+
+def _use_streaming(data, streaming):
+    # streaming=None picks the mode from the upload size
+    return len(data) >= streaming_threshold() if streaming is None else streaming
+
+
+def _read(source, kind):
+    # Only the bytes of the upload; decoding the workbook is the "read" stage of its parser
+    with stage("upload", source=kind) as s:
+        data = read_bytes(source)
+        s["bytes"] = len(data)
+    return data
+
+
+def _parse_masterteam(data, streaming):
+    if streaming:
+        return parse_masterteam_stream(iter_rows(data), CHUNKSIZE)
+    return read_masterteam(data)
+
+
+def _parse_jantar(data, streaming):
+    if streaming:
+        return parse_jantar_stream(iter_rows(data), CHUNKSIZE)
+    if is_xls(data):
+        # The .xls row reader loads the whole sheet anyway; find the layout in one read of it
+        sheet = read_sheet(data, "jantar", header=None, dtype=object)
+        positions = set(read_jantar_layout(sheet_rows(sheet))[0].positions)
+        return parse_jantar_sections(sheet[[column for column in sheet.columns if column in positions]])
+    # The layout comes from the top rows; the sheet is then read in one pass
+    positions = set(read_jantar_layout(iter_rows(data))[0].positions)
+    return parse_jantar_sections(read_sheet(data, "jantar", header=None, usecols=lambda i: i in positions,
+                                            dtype=object))
+
+
+def _parse_pn(data, streaming):
+    if streaming:
+        return expand_pn_stream(iter_rows(data), CHUNKSIZE)
+    if is_xls(data):
+        sheet = read_sheet(data, "pn", header=None, dtype=object)
+        layout = read_pn_layout(sheet_rows(sheet))[0]
+        df_pn = table_below(sheet, layout.header_row, layout.positions, PN_COLUMNS)
+    else:
+        layout = read_pn_layout(iter_rows(data))[0]
+        df_pn = read_sheet(data, "pn", header=layout.header_row, usecols=PN_COLUMNS, dtype=PN_DTYPES)
+    with stage("expand", source="pn") as s:
+        df_expanded = expand_pn(df_pn)
+        s["rows"] = len(df_expanded)
+    return df_expanded
+
+
+# Export kind -> (parser, row count of its result, name in error messages)
+PARSERS = {
+    "masterteam": (_parse_masterteam, lambda result: len(result[1]), "MasterTeam"),
+    "jantar": (_parse_jantar, lambda result: len(result.days), "Jantar"),
+    "pn": (_parse_pn, len, "putnih naloga"),
+}
+
+
+def _parse(kind, data, streaming):
+    # One "parse" stage; it only runs (and is measured) when the cache misses
+    parse, rows, _ = PARSERS[kind]
+    with stage("parse", source=kind, streaming=streaming) as s:
+        result = parse(data, streaming)
+        s["rows"] = rows(result)
+    return result
+
+
+def _load(kind, source, streaming, cache=True):
+    data = _read(source, kind)
+    streaming = _use_streaming(data, streaming)
+    if not cache:
+        return _parse(kind, data, streaming)
+    return parse_cache.get_or_parse(kind, data, lambda: _parse(kind, data, streaming))
+
+
+def load_masterteam(source, streaming=None, cache=True):
+    """Return (period, melted_master) for a MasterTeam export.
+
+    With cache=False the export is parsed without keeping the result in
+    parse_cache (the same goes for load_jantar and load_pn).
+    """
+    return _load("masterteam", source, streaming, cache)
+
+
+def load_jantar(source, streaming=None, cache=True):
+    """Return the JantarExport (sections and daily rows) for a Jantar export."""
+    return _load("jantar", source, streaming, cache)
+
+
+def load_pn(source, streaming=None, cache=True):
+    """Return the travel orders expanded to one row per day."""
+    return _load("pn", source, streaming, cache)
+
+
+class LoadError(ValueError):
+    """Some exports could not be parsed; errors maps each export kind to its exception."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("\n".join(f"Greška u datoteci {PARSERS[kind][2]}: {error}" for kind, error in errors.items()))
+
+
+def _worker_pool():
+    # Started on first use and kept for later uploads. forkserver (or spawn)
+    # starts clean workers instead of forking Streamlit's server threads
+    global _pool
+    if _pool is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        _pool = ProcessPoolExecutor(max_workers=min(len(PARSERS), os.cpu_count() or 1), mp_context=context)
+    return _pool
+
+
+def _parse_in_worker(kind, data, streaming, memory):
+    # Runs in a worker process; its stages are recorded there and sent back with the result
+    if memory is None:
+        return _parse(kind, data, streaming), []
+    with recording(memory) as log:
+        result = _parse(kind, data, streaming)
+    return result, log.records
+
+
+def _worker_result(future):
+    global _pool
+    try:
+        result, records = future.result()
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a new pool next time
+        _pool = None
+        raise
+    log = current_log()
+    if log is not None:
+        log.extend(records)
+    return result
+
+
+def load_exports(masterteam, jantar, pn, streaming=None, concurrent=True):
+    """Load the MasterTeam, Jantar and PN exports of one reconciliation.
+
+    Exports missing from the parse cache are parsed side by side in worker
+    processes when there are several large ones and more than one CPU, so
+    loading takes about as long as the slowest parse. A file that fails does
+    not stop the others, which are still parsed and cached; the failures are
+    raised together as one LoadError.
+    """
+    datas = {kind: _read(source, kind) for kind, source in
+             {"masterteam": masterteam, "jantar": jantar, "pn": pn}.items()}
+    modes = {kind: _use_streaming(data, streaming) for kind, data in datas.items()}
+    missing = [kind for kind, data in datas.items() if parse_cache.key(kind, data) not in parse_cache]
+
+    futures = {}
+    if (concurrent and len(missing) > 1 and (os.cpu_count() or 1) > 1
+            and sum(len(datas[kind]) for kind in missing) >= PROCESS_THRESHOLD):
+        log = current_log()
+        memory = None if log is None else log.memory
+        pool = _worker_pool()
+        futures = {kind: pool.submit(_parse_in_worker, kind, datas[kind], modes[kind], memory) for kind in missing}
+
+    results, errors = {}, {}
+    for kind, data in datas.items():
+        if kind in futures:
+            parse = lambda future=futures[kind]: _worker_result(future)
+        else:
+            parse = lambda kind=kind, data=data: _parse(kind, data, modes[kind])
+        try:
+            results[kind] = parse_cache.get_or_parse(kind, data, parse)
+        except Exception as e:
+            errors[kind] = e
+    if errors:
+        raise LoadError(errors)
+    return results["masterteam"], results["jantar"], results["pn"]
@@ -0,0 +1,137 @@
+import re
+from itertools import chain
+
+import pandas as pd
+
+from masterjantar.ingest import (frame_from_rows, header_names, is_xls, iter_chunks, iter_rows, read_sheet,
+                                sheet_rows, table_below)
+from masterjantar.instrument import stage
+from masterjantar.layout import Layout, read_head, resolve_layout
+from masterjantar.schemas import PERSONAL_DATA_COLUMNS, is_day_column, masterteam_positions
+
+
+def clean_masterteam(df_master):
+    """Keep the numbered person rows and the named columns of a MasterTeam sheet (read with header=3)."""
+    df_master = df_master.drop(columns=[df_master.columns[0]])
+
+    # Remove rows where the "Rbr" column is not a number or is greater than 1000
+    df_master['Rbr'] = pd.to_numeric(df_master['Rbr'], errors='coerce')
+    df_master = df_master.dropna(subset=['Rbr'])
+    df_master = df_master[df_master['Rbr'] <= 1000]
+
+    # Drop columns with names that contain "Unnamed" or are blank
+    df_master = df_master.loc[:, ~df_master.columns.str.contains('^Unnamed|^$', na=False)]
+    return df_master.reset_index(drop=True)
+
+
+def melt_days(df_master):
+    """Melt the day columns of a cleaned MasterTeam sheet into one row per person and day."""
+    with stage("melt", source="masterteam") as s:
+        # Extract only the day columns (Su 1 to Pe 31)
+        day_columns = [col for col in df_master.columns if is_day_column(col)]
+
+        # Melt the day columns into rows (long format)
+        melted_master = pd.melt(df_master, id_vars=PERSONAL_DATA_COLUMNS, value_vars=day_columns,
+                                var_name="Day", value_name="Value")
+
+        # Clean up the "Day" column to only include the day number (e.g., '1', '2', etc.)
+        melted_master['Day'] = melted_master['Day'].str.extract(r'(\d+)', expand=False)
+        s["rows"] = len(melted_master)
+    return melted_master
+
+
+def melt_masterteam(df_master):
+    """Clean a MasterTeam sheet (read with header=3) and melt the day columns into rows."""
+    return melt_days(clean_masterteam(df_master))
+
+
+def parse_period(text):
+    """Extract the MM.YYYY. period from the MasterTeam title cell as a monthly pd.Period."""
+    # Use regular expression to extract MM.YYYY. format (with dot after year)
+    month_year_match = re.search(r'(\d{2})\.(\d{4})\.', str(text).strip())
+    if not month_year_match:
+        return None
+    month, year = month_year_match.groups()
+    return pd.Period(year=int(year), month=int(month), freq="M")
+
+
+def _period_cell(head, header_row):
+    # The first cell above the header holding a "MM.YYYY." period
+    for row, values in enumerate(head[:header_row]):
+        for column, value in enumerate(values):
+            if isinstance(value, str) and parse_period(value) is not None:
+                return row, column
+    return None
+
+
+def _period_at(head, cell):
+    if cell is None or len(head[cell[0]]) <= cell[1]:
+        return None
+    return parse_period(head[cell[0]][cell[1]])
+
+
+def detect_layout(head):
+    """Find the header row (the one naming Rbr and PREZIME i IME), the columns to read and the period cell."""
+    for header_row, values in enumerate(head):
+        cells = {str(value).strip() for value in values if value is not None}
+        if all(column in cells for column in PERSONAL_DATA_COLUMNS):
+            names = header_names(values)
+            positions = masterteam_positions(names)
+            return Layout(header_row, positions, [names[p] for p in positions], _period_cell(head, header_row))
+    raise ValueError("MasterTeam datoteka nema zaglavlje tablice.")
+
+
+def _read_head(rows):
+    # The period and the layout of the table, from the top rows of the export
+    head = read_head(rows)
+    layout = resolve_layout("masterteam", head, detect_layout)
+    # A stored profile fits every month of the template; the day names ("Po 1") are this month's
+    names = header_names(head[layout.header_row])
+    layout = layout._replace(names=[names[p] for p in layout.positions])
+    period = _period_at(head, layout.period_cell)
+    if period is None:
+        # The title rows changed above an unchanged header; look for the period again
+        period = _period_at(head, _period_cell(head, layout.header_row))
+    return period, layout, head
+
+
+def read_period(rows):
+    """The period of a MasterTeam export, read from its title rows only."""
+    return _read_head(rows)[0]
+
+
+def read_masterteam(data):
+    """Read a MasterTeam workbook and return its period and the melted day table.
+
+    The title and header rows are peeked with the row reader; the table itself
+    is then read in one pass, limited to the id and day columns and without
+    type inference. A .xls sheet is read once and its top rows taken from that
+    read, since its row reader would load the whole sheet for the peek as well.
+    """
+    if is_xls(data):
+        sheet = read_sheet(data, "masterteam", header=None, dtype=object)
+        period, layout, _ = _read_head(sheet_rows(sheet))
+        df_master = table_below(sheet, layout.header_row, layout.positions, layout.names)
+    else:
+        period, layout, _ = _read_head(iter_rows(data))
+        df_master = read_sheet(data, "masterteam", header=None, skiprows=layout.header_row + 1,
+                               usecols=layout.positions, dtype=object)
+        df_master.columns = layout.names
+    return period, melt_masterteam(df_master)
+
+
+def parse_masterteam_stream(rows, chunksize):
+    """Like read_masterteam, but over a row iterator (see ingest.iter_rows).
+
+    Only the cleaned person rows of each chunk are kept, so the raw sheet is
+    never held in memory at once; the day columns are melted at the end.
+    """
+    rows = iter(rows)
+    period, layout, head = _read_head(rows)
+    # The rows read past the header belong to the table
+    rows = chain(head[layout.header_row + 1:], rows)
+    parts = [clean_masterteam(frame_from_rows(chunk, layout.names, layout.positions, infer=False))
+             for chunk in iter_chunks(rows, chunksize)]
+    parts = parts or [clean_masterteam(frame_from_rows([], layout.names, layout.positions, infer=False))]
+    df_master = pd.concat(parts, ignore_index=True)
+    return period, melt_days(df_master)
@@ -0,0 +1,148 @@
+"""Serializing reports for download, only when they are asked for.
+
+Besides Excel for people, reports can be written as Parquet, Arrow IPC or
+CSV for programs that read them back (Parquet and Arrow need pyarrow).
+"""
+import importlib.util
+import os
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import xlsxwriter
+
+from masterjantar.cache import ParseCache, digest
+from masterjantar.instrument import stage
+
+XLSX_MIME = "application/vnd.ms-excel"
+
+# Output format -> (file extension, MIME type)
+FORMATS = {
+    "xlsx": (".xlsx", XLSX_MIME),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+    "csv": (".csv", "text/csv"),
+}
+ARROW_FORMATS = ("parquet", "arrow")
+PARQUET_COMPRESSION = "zstd"
+
+# Serialized outputs, kept until the inputs they were built from change
+output_cache = ParseCache(max_entries=32)
+
+
+def write_workbook(sheets, target):
+    """Write {sheet name: frame} as the sheets of one workbook in a single pass.
+
+    xlsxwriter's constant-memory mode flushes every row as soon as it is
+    written, so only one row per sheet is held in memory while encoding.
+    """
+    workbook = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "default_date_format": "dd.mm.yyyy",
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "nan_inf_to_errors": True,
+    })
+    header_format = workbook.add_format({"bold": True})
+    with stage("serialize", format="xlsx") as s:
+        try:
+            for sheet_name, frame in sheets.items():
+                worksheet = workbook.add_worksheet(sheet_name[:31])
+                worksheet.write_row(0, 0, [str(column) for column in frame.columns], header_format)
+                values = frame.astype(object).where(frame.notna(), None)
+                for row, record in enumerate(values.itertuples(index=False, name=None), start=1):
+                    worksheet.write_row(row, 0, record)
+        finally:
+            workbook.close()
+        s["rows"] = sum(len(frame) for frame in sheets.values())
+
+
+def workbook_bytes(sheets):
+    output = BytesIO()
+    write_workbook(sheets, output)
+    return output.getvalue()
+
+
+def available_formats():
+    """The output formats that can be written with the installed packages."""
+    if importlib.util.find_spec("pyarrow") is not None:
+        return list(FORMATS)
+    return [fmt for fmt in FORMATS if fmt not in ARROW_FORMATS]
+
+
+def _arrow_compatible(frame):
+    # Arrow columns hold one type; object columns mixing types (e.g. times and
+    # text in Jantar's Ukupno) are written as text
+    frame = frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        if pd.api.types.infer_dtype(frame[column], skipna=True).startswith("mixed"):
+            frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str))
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def write_table(frame, target, fmt):
+    """Write one frame in a non-Excel output format."""
+    with stage("serialize", format=fmt, rows=len(frame)):
+        if fmt == "parquet":
+            _arrow_compatible(frame).to_parquet(target, index=False, compression=PARQUET_COMPRESSION)
+        elif fmt == "arrow":
+            _arrow_compatible(frame).reset_index(drop=True).to_feather(target)
+        elif fmt == "csv":
+            frame.to_csv(target, index=False, encoding="utf-8")
+        else:
+            raise ValueError(f"Nepoznat format: {fmt}")
+
+
+def table_bytes(frame, fmt):
+    output = BytesIO()
+    write_table(frame, output, fmt)
+    return output.getvalue()
+
+
+def output_bytes(sheets, fmt):
+    """Serialize {sheet name: frame}: one workbook for xlsx, otherwise one
+    table, or a zip with one file per sheet when there are several."""
+    if fmt == "xlsx":
+        return workbook_bytes(sheets)
+    if len(sheets) == 1:
+        return table_bytes(next(iter(sheets.values())), fmt)
+    extension = FORMATS[fmt][0]
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        for sheet_name, frame in sheets.items():
+            # Parquet and Arrow are compressed already
+            compress = zipfile.ZIP_DEFLATED if fmt == "csv" else zipfile.ZIP_STORED
+            archive.writestr(sheet_name + extension, table_bytes(frame, fmt), compress_type=compress)
+    return output.getvalue()
+
+
+def output_file(file_name, sheets, fmt):
+    """(file name, MIME type) of output_bytes(sheets, fmt), from an .xlsx file name."""
+    if fmt != "xlsx" and len(sheets) > 1:
+        extension, mime = ".zip", "application/zip"
+    else:
+        extension, mime = FORMATS[fmt]
+    return os.path.splitext(file_name)[0] + extension, mime
+
+
+def inputs_key(*datas):
+    """Identity of a set of inputs, used to key the outputs built from them."""
+    return digest(b"".join(digest(data).encode() for data in datas))
+
+
+def deferred_output(inputs, name, sheets, fmt="xlsx"):
+    """A callable that serializes the sheets on first use and then serves the cached bytes.
+
+    Pass it as st.download_button(data=...) so the file is only encoded
+    when the button is clicked.
+    """
+    key = inputs, name, tuple(sheets), fmt
+    return lambda: output_cache.get_or_compute(key, lambda: output_bytes(sheets, fmt))
+
+
+def download_args(inputs, name, file_name, sheets, fmt="xlsx"):
+    """Keyword arguments for a deferred st.download_button of the sheets in fmt."""
+    file_name, mime = output_file(file_name, sheets, fmt)
+    return {"data": deferred_output(inputs, name, sheets, fmt), "file_name": file_name, "mime": mime,
+            "on_click": "ignore"}
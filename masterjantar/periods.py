@@ -0,0 +1,141 @@
+"""Reconciling several months at once (a quarter, a year to date, ...), one period at a time.
+
+Every MasterTeam export covers one month. Jantar exports are matched to the
+months by their Razdoblje and travel orders by trip date. Each month is then
+joined and checked on its own and the per-month reports are stacked at the
+end. The exports are parsed outside the app's parse_cache: a MasterTeam
+export is released after its month, a Jantar export after the last month it
+covers, so a year to date does not keep every month's frames in memory.
+"""
+import re
+
+import pandas as pd
+
+from masterjantar.ingest import iter_rows
+from masterjantar.instrument import stage
+from masterjantar.jantar import _concat_exports, read_periods
+from masterjantar.loaders import load_jantar, load_masterteam, load_pn, read_bytes
+from masterjantar.masterteam import read_period
+from masterjantar.report import REPORTS, reconcile
+from masterjantar.rules import HOURS_TOLERANCE
+
+# Name lists of every month, combined without repeats
+NAME_CHECKS = ["unmatched_names", "name_clashes"]
+
+
+def select_periods(available, spec=None):
+    """The available months a spec selects.
+
+    spec is "2024" (a year), "2024-Q1" (a quarter), "2024-03" (a month),
+    "2024-01:2024-06" (a range), "ytd" (January up to the latest available
+    month) or None / "all".
+    """
+    available = sorted(available)
+    spec = (spec or "all").strip().lower()
+    if spec == "all" or not available:
+        return available
+    try:
+        if spec == "ytd":
+            start, end = pd.Period(year=available[-1].year, month=1, freq="M"), available[-1]
+        elif ":" in spec:
+            start, end = (pd.Period(part.strip(), freq="M") for part in spec.split(":", 1))
+        elif re.fullmatch(r"\d{4}-?q[1-4]", spec):
+            quarter = pd.Period(spec.replace("-", "").upper(), freq="Q")
+            start, end = quarter.asfreq("M", how="start"), quarter.asfreq("M", how="end")
+        elif re.fullmatch(r"\d{4}", spec):
+            start, end = pd.Period(f"{spec}-01", freq="M"), pd.Period(f"{spec}-12", freq="M")
+        else:
+            start = end = pd.Period(spec, freq="M")
+    except ValueError:
+        raise ValueError(f"Nepoznato razdoblje: {spec!r} (npr. 2024, 2024-Q1, 2024-03, 2024-01:2024-06, ytd).")
+    return [period for period in available if start <= period <= end]
+
+
+def _masterteam_months(sources):
+    # Period -> MasterTeam source, from the title rows of each export
+    months = {}
+    for source in sources:
+        period = read_period(iter_rows(read_bytes(source)))
+        if period is None:
+            raise ValueError("U MasterTeam datoteci nije pronađeno razdoblje (MM.YYYY.).")
+        if period in months:
+            raise ValueError(f"Dvije MasterTeam datoteke za razdoblje {period.strftime('%m.%Y')}.")
+        months[period] = source
+    return months
+
+
+def _jantar_months(sources, streaming):
+    # (source, months it covers, the parsed export or None) for every Jantar export
+    covered = []
+    for source in sources:
+        periods = read_periods(iter_rows(read_bytes(source)))
+        export = None
+        if not periods:
+            # No Razdoblje row: parse it and take the months of its days
+            export = load_jantar(source, streaming, cache=False)
+            datum = pd.to_datetime(export.days["Datum"], dayfirst=True)
+            periods = datum.dt.to_period("M").dropna().unique().tolist()
+        covered.append((source, set(periods), export))
+    return covered
+
+
+def reconcile_periods(masterteam, jantar, pn, periods=None, streaming=None, store=None, scope="",
+                      hours_tolerance=HOURS_TOLERANCE, suggest_names=False):
+    """Reconcile lists of MasterTeam, Jantar and PN exports month by month.
+
+    periods selects the months (see select_periods). Returns the REPORTS frames
+    of all the months stacked, "unmatched_names", "name_clashes", "by_period" (row counts per
+    month), "periods" (the months reconciled) and "period" (their range).
+    """
+    months = _masterteam_months(masterteam)
+    selected = select_periods(months, periods)
+    if not selected:
+        raise ValueError("Za odabrano razdoblje nema MasterTeam podataka.")
+    jantar_months = _jantar_months(jantar, streaming)
+    # Parsed Jantar exports by position, kept until the last selected month they cover
+    last_month = {i: max(period for period in selected if period in covered)
+                  for i, (_, covered, _) in enumerate(jantar_months) if covered.intersection(selected)}
+    parsed = {i: export for i, (_, _, export) in enumerate(jantar_months) if export is not None and i in last_month}
+    jantar_months = [(source, covered) for source, covered, _ in jantar_months]
+
+    # Travel orders are small once expanded; split them by the month of each trip day
+    df_expanded = pd.concat([load_pn(source, streaming, cache=False) for source in pn], ignore_index=True)
+    pn_months = df_expanded["Datum"].dt.to_period("M")
+
+    results = []
+    for period in selected:
+        with stage("month", period=str(period)):
+            _, melted_master = load_masterteam(months[period], streaming, cache=False)
+            exports = []
+            for i, (source, covered) in enumerate(jantar_months):
+                if period not in covered:
+                    continue
+                if i not in parsed:
+                    parsed[i] = load_jantar(source, streaming, cache=False)
+                exports.append(parsed[i].in_period(period))
+                if last_month[i] == period:
+                    del parsed[i]
+            if not exports:
+                raise ValueError(f"Nema Jantar izvoza za razdoblje {period.strftime('%m.%Y')}.")
+            jantar_month = exports[0] if len(exports) == 1 else _concat_exports(exports)
+            pn_month = df_expanded[(pn_months == period).to_numpy()].reset_index(drop=True)
+
+            if store is not None:
+                result = store.reconcile(period, melted_master, jantar_month, pn_month, scope=scope,
+                                         hours_tolerance=hours_tolerance, suggest_names=suggest_names)
+            else:
+                result = reconcile(period, melted_master, jantar_month, pn_month, hours_tolerance, suggest_names)
+        # Keep only the report frames; the month's grid and parsed data are released here
+        results.append((period, {key: result[key] for key in [*REPORTS, *NAME_CHECKS]}))
+        del melted_master, exports, jantar_month, pn_month, result
+
+    reports = {key: pd.concat([result[key] for _, result in results], ignore_index=True) for key in REPORTS}
+    for key in NAME_CHECKS:
+        reports[key] = pd.concat([result[key] for _, result in results],
+                                 ignore_index=True).drop_duplicates(ignore_index=True)
+    reports["by_period"] = pd.DataFrame(
+        [{"Razdoblje": period.strftime("%m.%Y"), **{sheet: len(result[key]) for key, (sheet, _) in REPORTS.items()}}
+         for period, result in results])
+    reports["periods"] = selected
+    reports["period"] = selected[0] if len(selected) == 1 else f"{selected[0]}..{selected[-1]}"
+    return reports
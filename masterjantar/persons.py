@@ -0,0 +1,152 @@
+import difflib
+import functools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Letters that do not decompose into a base letter and a combining mark
+_TRANSLITERATE = str.maketrans({"Đ": "D", "đ": "d", "Ł": "L", "ł": "l", "Ø": "O", "ø": "o"})
+
+# Names whose keys are kept; bounded, since the app's process lives across many uploads
+NAME_CACHE_SIZE = 50_000
+
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def name_key(name):
+    """Join key for a person's name: upper case and single spaces, diacritics kept."""
+    if not isinstance(name, str):
+        return None
+    return re.sub(r"\s+", " ", name).strip().upper() or None
+
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(name):
+    """Loose key for a person's name: upper case, single spaces, no diacritics."""
+    if not isinstance(name, str):
+        return None
+    name = unicodedata.normalize("NFKD", name.translate(_TRANSLITERATE))
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"\s+", " ", name).strip().upper()
+    return name or None
+
+
+class PersonIndex:
+    """Maps names to compact integer person ids for one run.
+
+    Names are joined on name_key. A Jantar or PN name that has no exact match
+    falls back to normalize_name (no diacritics), but only when that key
+    belongs to one person, so "ČOSIĆ ANA" and "ĆOSIĆ ANA" stay two people.
+    Display names are kept as first seen (MasterTeam first) and are only
+    needed again when a report is written.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        # normalize_name -> ids of the people with that key
+        self._loose = {}
+        self.names = []
+        self.sources = []
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_frames(cls, melted_master, df_J_cleaned, df_expanded):
+        index = cls()
+        # Every MasterTeam name is a person of its own
+        index.add(melted_master["PREZIME i IME"], "MasterTeam", loose=False)
+        index.add(df_J_cleaned["Korisnik"], "Jantar")
+        index.add(df_expanded["Prezime Ime"], "PN")
+        return index
+
+    def _find(self, name, loose=True):
+        # The person with this exact key, else the only one with its loose key; -1 if none
+        person = self._ids.get(name_key(name), -1)
+        if person < 0 and loose:
+            matches = self._loose.get(normalize_name(name), [])
+            if len(matches) == 1:
+                person = matches[0]
+        return person
+
+    def add(self, names, source, loose=True):
+        """Register the names of one source and return their person ids (-1 for missing names).
+
+        With loose=False a name without an exact match is always a new person.
+        """
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+        unique_ids = np.full(len(uniques), -1, dtype=np.int32)
+        # Exact matches first, so a loose match cannot take a name another one spells exactly
+        for i, name in enumerate(uniques):
+            unique_ids[i] = self._find(name, loose=False)
+        for i, name in enumerate(uniques):
+            key = name_key(name)
+            if key is None or unique_ids[i] >= 0:
+                continue
+            person = self._find(name, loose)
+            if person < 0:
+                person = len(self.names)
+                self._loose.setdefault(normalize_name(name), []).append(person)
+                self.names.append(name)
+                self.sources.append(source)
+            self._ids[key] = person
+            unique_ids[i] = person
+        # Missing names are factorized to code -1, which picks the trailing -1
+        return np.append(unique_ids, np.int32(-1))[codes]
+
+    def lookup(self, names):
+        """Person ids of already registered names (-1 for unknown or missing names)."""
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+        unique_ids = np.array([self._find(name) for name in uniques], dtype=np.int32)
+        return np.append(unique_ids, np.int32(-1))[codes]
+
+    def keys(self, names):
+        """name_key of the person each name belongs to (None for unknown or missing names)."""
+        keys = np.array([*map(name_key, self.names), None], dtype=object)
+        return keys[self.lookup(names)]
+
+    def clashes(self):
+        """MasterTeam names that differ only in diacritics; they are kept as separate people."""
+        rows = []
+        for key, people in self._loose.items():
+            masterteam = [self.names[p] for p in people if self.sources[p] == "MasterTeam"]
+            if len(masterteam) > 1:
+                rows.extend({"PREZIME i IME": name, "Bez dijakritika": key} for name in masterteam)
+        return pd.DataFrame(rows, columns=["PREZIME i IME", "Bez dijakritika"])
+
+    def display_names(self, person_ids):
+        return np.asarray(self.names, dtype=object)[person_ids]
+
+    def unmatched(self, suggest=False, cutoff=0.85):
+        """People who only appear in Jantar or PN.
+
+        With suggest, each gets the closest MasterTeam name as a suggestion.
+        Only names with the same initial (the surname's) are compared, which
+        keeps the fuzzy matching from comparing every pair of names.
+        """
+        candidates = {}
+        if suggest:
+            for name, source in zip(self.names, self.sources):
+                key = normalize_name(name)
+                if source == "MasterTeam":
+                    candidates.setdefault(key[0], {}).setdefault(key, name)
+        rows = []
+        for name, source in zip(self.names, self.sources):
+            if source == "MasterTeam":
+                continue
+            suggestion = None
+            if suggest:
+                key = normalize_name(name)
+                initial = candidates.get(key[0], {})
+                match = difflib.get_close_matches(key, initial, n=1, cutoff=cutoff)
+                suggestion = initial[match[0]] if match else None
+            rows.append({"Izvor": source, "Ime": name, "Prijedlog (MasterTeam)": suggestion})
+        return pd.DataFrame(rows, columns=["Izvor", "Ime", "Prijedlog (MasterTeam)"])
+
+
+def assign_person_ids(index, melted_master, df_J_cleaned, df_expanded):
+    """Add the integer person_id join key to the three parsed frames."""
+    melted_master["person_id"] = index.lookup(melted_master["PREZIME i IME"])
+    df_J_cleaned["person_id"] = index.lookup(df_J_cleaned["Korisnik"])
+    df_expanded["person_id"] = index.lookup(df_expanded["Prezime Ime"])
@@ -0,0 +1,59 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from masterjantar.ingest import frame_from_rows, header_names, iter_chunks
+from masterjantar.layout import Layout, read_head, resolve_layout
+from masterjantar.schemas import PN_COLUMNS, positions_of
+
+
+def detect_layout(head):
+    """Find the header row: the first row naming any of the travel-order columns."""
+    for header_row, values in enumerate(head):
+        if any(value in PN_COLUMNS for value in values):
+            names = header_names(values)
+            return Layout(header_row, positions_of(names, PN_COLUMNS, "PN"), PN_COLUMNS)
+    raise ValueError("Datoteka putnih naloga nema zaglavlje tablice.")
+
+
+def read_layout(rows):
+    """The layout of a travel-order export and the top rows read to find it."""
+    head = read_head(rows)
+    return resolve_layout("pn", head, detect_layout), head
+
+
+def expand_pn(df_pn):
+    """Expand every travel order (putni nalog) into one row per day it covers."""
+    # Remove the "SVEUKUPNO" rows
+    df_pn = df_pn[df_pn['Broj PN\n'] != 'SVEUKUPNO']
+
+    start = pd.to_datetime(df_pn["Dat. Polaska"], errors='coerce')
+    end = pd.to_datetime(df_pn["Dat. Povratka"], errors='coerce')
+
+    # Number of days in each trip, the same count pd.date_range(start, end) would give
+    days = ((end - start) // pd.Timedelta(days=1) + 1).fillna(0).clip(lower=0).astype(np.int64).to_numpy()
+
+    # Repeat each trip once per day and add the day offset within the trip
+    rows = np.repeat(np.arange(len(df_pn)), days)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(days) - days, days)
+    dates = start.to_numpy()[rows] + pd.to_timedelta(offsets, unit="D").to_numpy()
+
+    return pd.DataFrame({
+        "Prezime Ime": df_pn['Prezime i ime'].to_numpy()[rows],
+        "Datum": pd.DatetimeIndex(dates).normalize(),
+        "Razlog odsutnosti": df_pn["Zadatak službenog puta"].to_numpy()[rows],
+    })
+
+
+def expand_pn_stream(rows, chunksize):
+    """Like expand_pn over pd.read_excel(header=...), but over a row iterator in chunks."""
+    rows = iter(rows)
+    layout, head = read_layout(rows)
+    # The rows read past the header belong to the table
+    rows = chain(head[layout.header_row + 1:], rows)
+    parts = [expand_pn(frame_from_rows(chunk, PN_COLUMNS, layout.positions, infer=False))
+             for chunk in iter_chunks(rows, chunksize)]
+    # Chunks without trips (e.g. only the SVEUKUPNO row) would turn the name and reason columns into object
+    parts = [part for part in parts if len(part)] or parts[:1]
+    return pd.concat(parts or [expand_pn(frame_from_rows([], PN_COLUMNS, layout.positions))], ignore_index=True)
@@ -0,0 +1,78 @@
+import pandas as pd
+
+from masterjantar.grid import MonthGrid
+from masterjantar.instrument import stage
+from masterjantar.loaders import load_exports
+from masterjantar.persons import PersonIndex, assign_person_ids
+from masterjantar.rules import HOURS_TOLERANCE, RULES
+
+# Report key -> (sheet name, download file name)
+REPORTS = {
+    "merged": ("Merged Report", "merged_report.xlsx"),
+    "absent_per_jantar": ("1. Odsutni prema Jantaru", "1. Odsutni prema Jantaru.xlsx"),
+    "absent_per_masterteam": ("1. Odsutni prema MasterTeam", "1. Odsutni prema MasterTeam.xlsx"),
+    "hours_mismatch": ("2. Razlika u satima", "2. Razlika u satima.xlsx"),
+    # Every rule hit in one table, tagged with the rule (see rules.py)
+    "discrepancies": ("Odstupanja", "Odstupanja.xlsx"),
+}
+
+
+def reconcile(period, melted_master, jantar, df_expanded, hours_tolerance=HOURS_TOLERANCE, suggest_names=False):
+    """Join the parsed MasterTeam, Jantar and PN data and build the reconciliation reports.
+
+    Returns a dict with the report frames under the REPORTS keys, the names
+    missing from MasterTeam under "unmatched_names" (with the closest
+    MasterTeam name when suggest_names is set), MasterTeam names that differ
+    only in diacritics under "name_clashes", the period under "period" and
+    the MonthGrid under "grid". Days whose clocked hours differ from
+    MasterTeam's by more than hours_tolerance are reported as well.
+    """
+    # Ensure 'Datum' in the Jantar daily rows is in datetime format
+    jantar.days["Datum"] = pd.to_datetime(jantar.days["Datum"], dayfirst=True)
+
+    with stage("merge") as s:
+        # Give every person one integer id across the three sources (names are
+        # matched without case or extra spaces, and without diacritics where
+        # that is unambiguous) and join on that id
+        persons = PersonIndex.from_frames(melted_master, jantar.sections, df_expanded)
+        assign_person_ids(persons, melted_master, jantar.sections, df_expanded)
+
+        # Lay the three sources out as aligned persons × days arrays for the MasterTeam period
+        grid = MonthGrid.from_frames(period, melted_master, jantar.daily(["person_id"]), df_expanded, persons,
+                                     hours_tolerance)
+        s["rows"] = grid.masterteam.size
+
+    with stage("filter") as s:
+        # Every rule is evaluated once; its mask gives both its own report and its discrepancy rows
+        masks = grid.evaluate()
+        reports = {
+            "merged": grid.merged_report(),
+            **{key: grid.rule_report(key, mask=masks[key]) for key in RULES},
+            "discrepancies": grid.discrepancies(masks=masks),
+        }
+        s["rows"] = len(reports["discrepancies"])
+
+    with stage("match names") as s:
+        reports["unmatched_names"] = persons.unmatched(suggest_names)
+        reports["name_clashes"] = persons.clashes()
+        s["rows"] = len(reports["unmatched_names"])
+
+    return {**reports, "period": period, "grid": grid}
+
+
+def reconcile_files(masterteam, jantar, pn, streaming=None, store=None, scope="", hours_tolerance=HOURS_TOLERANCE,
+                    concurrent=True, suggest_names=False):
+    """Load the three exports (uploads, paths or bytes) and reconcile them.
+
+    streaming=None reads large files in chunks and small ones at once (see loaders).
+    The exports are parsed side by side unless concurrent is False (see
+    loaders.load_exports). With a MonthStore, only the days that changed since
+    the last run of the same month (and scope) are re-checked.
+    """
+    (period, melted_master), jantar_export, df_expanded = load_exports(masterteam, jantar, pn, streaming, concurrent)
+    if period is None:
+        raise ValueError("U MasterTeam datoteci nije pronađeno razdoblje (MM.YYYY.).")
+    sources = (period, melted_master, jantar_export, df_expanded)
+    if store is not None:
+        return store.reconcile(*sources, scope=scope, hours_tolerance=hours_tolerance, suggest_names=suggest_names)
+    return reconcile(*sources, hours_tolerance, suggest_names)
@@ -0,0 +1,41 @@
+"""Discrepancy checks, each declared once as a vectorized predicate over a MonthGrid.
+
+A predicate takes the grid and returns a persons × days boolean mask. The
+grid computes the inputs the rules share (the numeric MasterTeam values, the
+Jantar presence masks) once, so all rules are evaluated in one pass of
+elementwise operations and a new check is one more entry here.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# title: report title and tag in the discrepancy table; numeric: show the
+# MasterTeam value coerced to a number; cut_off: only days Jantar has reached;
+# details: optional {column: grid -> persons × days array} added to the rule's report
+Rule = namedtuple("Rule", ["title", "predicate", "numeric", "cut_off", "details"], defaults=[None])
+
+# Largest difference in hours between Jantar's clock times and MasterTeam that is not reported
+HOURS_TOLERANCE = 0.5
+
+RULES = {
+    # Hours in MasterTeam, but absent or missing in Jantar and no travel order
+    "absent_per_jantar": Rule(
+        "1. Odsutni prema Jantaru",
+        lambda grid: grid.has_hours & grid.jantar_absent & ~grid.in_pn,
+        numeric=True, cut_off=True),
+    # Present in Jantar (not 'Odsutan' or 'Vikend'), but no hours in MasterTeam
+    "absent_per_masterteam": Rule(
+        "1. Odsutni prema MasterTeam",
+        lambda grid: grid.in_masterteam & ~grid.has_hours & grid.jantar_present,
+        numeric=False, cut_off=True),
+    # Hours clocked in Jantar differ from the hours in MasterTeam by more than the tolerance
+    "hours_mismatch": Rule(
+        "2. Razlika u satima",
+        lambda grid: (grid.has_hours & ~np.isnan(grid.worked_hours)
+                      & (np.abs(grid.worked_hours - grid.masterteam_numeric) > grid.hours_tolerance)),
+        numeric=True, cut_off=True,
+        details={
+            "Sati (Jantar)": lambda grid: grid.worked_hours.round(2),
+            "Razlika": lambda grid: (grid.worked_hours - grid.masterteam_numeric).round(2),
+        }),
+}
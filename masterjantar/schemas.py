@@ -0,0 +1,39 @@
+"""The columns (and read types) the reports need from each export.
+
+Readers only load these columns, and object dtypes skip pandas' type
+inference for values that are cleaned or coerced later anyway.
+"""
+
+# Jantar is read positionally; the parser only looks at the first eight columns
+JANTAR_COLUMN_COUNT = 8
+
+# Identify unique persons based on the first two columns (Rbr and PREZIME i IME)
+PERSONAL_DATA_COLUMNS = ["Rbr", "PREZIME i IME"]
+
+# Travel orders: the columns expand_pn uses. The dates are left to the reader,
+# which already returns Excel dates as datetimes.
+PN_COLUMNS = ["Broj PN\n", "Prezime i ime", "Dat. Polaska", "Dat. Povratka", "Zadatak službenog puta"]
+PN_DTYPES = {"Broj PN\n": object, "Prezime i ime": object, "Zadatak službenog puta": object}
+
+
+def is_day_column(name):
+    # Day columns are headed "Su 1" ... "Pe 31"
+    return isinstance(name, str) and any(str(i) in name for i in range(1, 32))
+
+
+def positions_of(names, columns, source):
+    """Positions of the given header names, with a clear error when one is missing."""
+    missing = [column for column in columns if column not in names]
+    if missing:
+        raise ValueError(f"{source}: nedostaju stupci {', '.join(repr(c) for c in missing)}")
+    return [names.index(column) for column in columns]
+
+
+def masterteam_positions(names):
+    """Positions of the MasterTeam columns to read from a header row.
+
+    Column 0 is kept as well because clean_masterteam drops the first column by position.
+    """
+    positions_of(names, PERSONAL_DATA_COLUMNS, "MasterTeam")
+    return [0] + [i for i, name in enumerate(names)
+                  if i > 0 and (name in PERSONAL_DATA_COLUMNS or is_day_column(name))]
@@ -0,0 +1,283 @@
+"""A local SQLite store of reconciled months, so mid-month re-runs only re-check what changed.
+
+For every (scope, period) the store keeps the day facts of each source (the
+MasterTeam value, the Jantar Statistika and the travel-order reason per person
+and day) and the report rows built from them. A new upload is reduced to the
+same facts and diffed against the stored ones; only the people with new,
+changed or removed days are joined again, and only those days' report rows
+are replaced. The Jantar cut-off date is applied when the reports are read
+back, so days Jantar has newly reached need no re-check either.
+"""
+import json
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from masterjantar.cache import PARSER_VERSION
+from masterjantar.grid import DISCREPANCY_COLUMNS, REPORT_COLUMNS, MonthGrid, _day_index
+from masterjantar.instrument import stage
+from masterjantar.jantar import open_sessions, worked_hours
+from masterjantar.persons import PersonIndex, assign_person_ids, name_key
+from masterjantar.rules import HOURS_TOLERANCE, RULES
+
+# Where the app keeps its store (relative to the working directory)
+DEFAULT_STORE_PATH = "masterjantar_store.sqlite"
+
+# Source -> (name column, value column) of the parsed frames reconcile() takes
+FACT_SOURCES = {
+    "masterteam": ("PREZIME i IME", "Value"),
+    "jantar": ("Korisnik", "Statistika"),
+    "jantar_hours": ("Korisnik", "Sati"),
+    "pn": ("Prezime Ime", "Razlog odsutnosti"),
+}
+# Report rows stored per day: the merged report and one report per rule; the
+# discrepancy table is put together from the rule reports when read back
+CHECKED_REPORTS = ["merged", *RULES]
+
+# Bump when the tables below or the way facts are written change; older store files
+# are then started over
+STORE_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS months (
+    scope TEXT, period TEXT, parser_version INTEGER, last_jantar_date TEXT, hours_tolerance REAL,
+    PRIMARY KEY (scope, period)
+);
+CREATE TABLE IF NOT EXISTS facts (
+    scope TEXT, period TEXT, source TEXT, person TEXT, day INTEGER, value TEXT,
+    PRIMARY KEY (scope, period, person, day, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS checks (
+    scope TEXT, period TEXT, report TEXT, person TEXT, day INTEGER,
+    name, konto, masterteam, jantar, details TEXT,
+    PRIMARY KEY (scope, period, person, day, report)
+) WITHOUT ROWID;
+"""
+
+
+def _sql_value(value):
+    # SQLite takes Python scalars only; missing values are stored as NULL
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _fact_text(values):
+    # Facts are compared as text; whole floats are written as ints first, so 8 and
+    # 8.0 (the same hours read into an int or a float column) are one value
+    values = (int(v) if isinstance(v, float) and v.is_integer() else v for v in map(_sql_value, values))
+    return [None if v is None else str(v) for v in values]
+
+
+def _fact_frames(frames):
+    # Jantar days only count where Statistika is filled in, as in MonthGrid, and
+    # the hours of a day add up all of its sessions (unknown while one is open)
+    days = frames["jantar"]
+    sessions = days.assign(Sati=worked_hours(days), open=open_sessions(days))
+    sessions = sessions.groupby(["Korisnik", "Datum"], as_index=False)
+    hours = sessions["Sati"].sum(min_count=1)
+    hours.loc[sessions["open"].any()["open"].to_numpy(), "Sati"] = np.nan
+    return {
+        "masterteam": frames["masterteam"],
+        "jantar": days[days["Statistika"].notna()],
+        "jantar_hours": hours[hours["Sati"].notna()],
+        "pn": frames["pn"],
+    }
+
+
+def day_facts(period, frames, persons):
+    """The first value per (source, person, day) within the period.
+
+    People are keyed by the name_key of the person their name belongs to in
+    the PersonIndex, so a Jantar name matched without diacritics shares its
+    MasterTeam person's key.
+    """
+    parts = []
+    for source, frame in frames.items():
+        name_column, value_column = FACT_SOURCES[source]
+        if source == "masterteam":
+            day = frame["Day"].astype(int).to_numpy()
+        else:
+            day = _day_index(frame["Datum"], period.start_time) + 1
+        parts.append(pd.DataFrame({
+            "source": source,
+            "person": persons.keys(frame[name_column]),
+            "day": day,
+            "value": _fact_text(frame[value_column]),
+        }))
+    facts = pd.concat(parts, ignore_index=True)
+    facts = facts[facts["person"].notna() & (facts["day"] >= 1) & (facts["day"] <= period.days_in_month)]
+    return facts.drop_duplicates(["source", "person", "day"]).reset_index(drop=True)
+
+
+class MonthStore:
+    """Persistent per-month facts and report rows in one SQLite file.
+
+    scope separates independent runs for the same month, e.g. departments
+    processed by the batch command.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._transaction() as con:
+            if con.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                con.executescript("DROP TABLE IF EXISTS months; DROP TABLE IF EXISTS facts; "
+                                  "DROP TABLE IF EXISTS checks;")
+            con.executescript(SCHEMA)
+            con.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    @contextmanager
+    def _transaction(self):
+        # Batch workers may write to the same file; wait for their locks
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _read(self, con, query, scope, period):
+        return pd.read_sql_query(query, con, params=(scope, str(period)))
+
+    def reconcile(self, period, melted_master, jantar, df_expanded, scope="", hours_tolerance=HOURS_TOLERANCE,
+                  suggest_names=False):
+        """Like report.reconcile, but only re-checks the days that differ from the stored month.
+
+        Returns the REPORTS frames, "unmatched_names", "name_clashes", "period" and
+        "changed_days" (how many person-days were re-checked).
+        """
+        jantar.days["Datum"] = pd.to_datetime(jantar.days["Datum"], dayfirst=True)
+        frames = {"masterteam": melted_master, "jantar": jantar.daily(["Korisnik"]), "pn": df_expanded}
+        persons = PersonIndex.from_frames(melted_master, jantar.sections, df_expanded)
+        with stage("day facts") as s:
+            facts = day_facts(period, _fact_frames(frames), persons)
+            s["rows"] = len(facts)
+        last_jantar_date = jantar.days["Datum"].max()
+        key = (scope, str(period))
+
+        with self._transaction() as con:
+            month = con.execute("SELECT parser_version, hours_tolerance FROM months WHERE scope = ? AND period = ?",
+                                key).fetchone()
+            if month != (PARSER_VERSION, hours_tolerance):
+                # Facts stored by another parser version, or checks made with
+                # another tolerance, may differ; start the month over
+                con.execute("DELETE FROM facts WHERE scope = ? AND period = ?", key)
+                con.execute("DELETE FROM checks WHERE scope = ? AND period = ?", key)
+
+            stored = self._read(con, "SELECT source, person, day, value FROM facts WHERE scope = ? AND period = ?",
+                                scope, period)
+            stored["day"] = stored["day"].astype(np.int64)
+            diff = facts.merge(stored, on=["source", "person", "day"], how="outer",
+                               suffixes=("", "_stored"), indicator=True)
+            differs = (diff["_merge"] != "both") | (diff["value"].fillna("\0") != diff["value_stored"].fillna("\0"))
+            changed = diff.loc[differs, ["person", "day"]].drop_duplicates()
+
+            with stage("merge") as s:
+                checks = self._recheck(period, frames, persons, changed, hours_tolerance)
+                s["rows"] = len(changed)
+
+            cells = list(changed.itertuples(index=False, name=None))
+            con.executemany("DELETE FROM facts WHERE scope = ? AND period = ? AND person = ? AND day = ?",
+                            [(*key, person, int(day)) for person, day in cells])
+            con.executemany("DELETE FROM checks WHERE scope = ? AND period = ? AND person = ? AND day = ?",
+                            [(*key, person, int(day)) for person, day in cells])
+            new_facts = facts.merge(changed, on=["person", "day"])
+            con.executemany("INSERT INTO facts VALUES (?, ?, ?, ?, ?, ?)",
+                            [(*key, source, person, int(day), value)
+                             for source, person, day, value in new_facts.itertuples(index=False, name=None)])
+            con.executemany("INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(*key, report, person, int(day), *map(_sql_value, values))
+                             for report, person, day, *values in checks.itertuples(index=False, name=None)])
+            con.execute("INSERT OR REPLACE INTO months VALUES (?, ?, ?, ?, ?)",
+                        (*key, PARSER_VERSION, None if pd.isna(last_jantar_date) else str(last_jantar_date),
+                         hours_tolerance))
+
+            rows = self._read(con, "SELECT report, person, day, name, konto, masterteam, jantar, details "
+                                   "FROM checks WHERE scope = ? AND period = ?", scope, period)
+
+        with stage("filter") as s:
+            reports = self._reports(period, rows, persons, last_jantar_date)
+            s["rows"] = len(reports["discrepancies"])
+        with stage("match names") as s:
+            reports["unmatched_names"] = persons.unmatched(suggest_names)
+            reports["name_clashes"] = persons.clashes()
+            s["rows"] = len(reports["unmatched_names"])
+        return {**reports, "period": period, "changed_days": len(changed)}
+
+    def _recheck(self, period, frames, persons, changed, hours_tolerance):
+        # Join and check only the people with changed days, without the Jantar
+        # cut-off, and keep the report rows of the changed days
+        columns = ["report", "person", "day", "PREZIME i IME", "Konto", "MasterTeam", "Jantar", "details"]
+        if changed.empty:
+            return pd.DataFrame(columns=columns)
+        people = set(changed["person"])
+        subset = {}
+        for source, frame in frames.items():
+            keys = pd.Series(persons.keys(frame[FACT_SOURCES[source][0]]), dtype=object)
+            subset[source] = frame[keys.isin(people).to_numpy()].copy()
+        # Join with the run's PersonIndex, so names match as in a full run (an index
+        # of the changed people alone could match a name without diacritics that is
+        # ambiguous among all of them)
+        assign_person_ids(persons, subset["masterteam"], subset["jantar"], subset["pn"])
+        grid = MonthGrid.from_frames(period, subset["masterteam"], subset["jantar"], subset["pn"], persons,
+                                     hours_tolerance)
+        grid.last_jantar_date = period.end_time
+
+        masks = grid.evaluate()
+        parts = []
+        for report in CHECKED_REPORTS:
+            frame = grid.merged_report() if report == "merged" else grid.rule_report(report, mask=masks[report])
+            frame.insert(0, "report", report)
+            # Report rows carry the person's display name, whose name_key is the person's key
+            frame.insert(1, "person", frame["PREZIME i IME"].map(name_key))
+            frame.insert(2, "day", frame["Full_Date"].dt.day)
+            frame = frame.merge(changed, on=["person", "day"])
+            # A rule's detail columns are kept as one JSON object per row
+            details = list(RULES[report].details or {}) if report in RULES else []
+            frame["details"] = [json.dumps(record) for record in frame[details].to_dict("records")] if details else None
+            parts.append(frame)
+        return pd.concat(parts, ignore_index=True)[columns]
+
+    def _reports(self, period, rows, persons, last_jantar_date):
+        # Rebuild the report frames in MonthGrid's order: by day, then by person
+        rows = rows.assign(
+            Full_Date=period.start_time + pd.to_timedelta(rows["day"] - 1, unit="D"),
+            order=persons.lookup(rows["name"]),
+        ).sort_values(["Full_Date", "order"], kind="stable")
+        rows = rows.rename(columns={"name": "PREZIME i IME", "konto": "Konto",
+                                    "masterteam": "MasterTeam", "jantar": "Jantar"})
+        values = {"Konto": object, "MasterTeam": object, "Jantar": object}
+        cut_off = rows["report"].map({key: rule.cut_off for key, rule in RULES.items()}).fillna(False).astype(bool)
+        rows = rows[~cut_off | (rows["Full_Date"] <= last_jantar_date)].astype(values)
+        rows = rows.where(rows.notna(), np.nan)
+
+        reports = {}
+        for report in CHECKED_REPORTS:
+            frame = rows.loc[rows["report"] == report, REPORT_COLUMNS].reset_index(drop=True)
+            details = list(RULES[report].details or {}) if report in RULES else []
+            if details:
+                stored = rows.loc[rows["report"] == report, "details"].map(json.loads).tolist()
+                frame = frame.join(pd.DataFrame(stored, columns=details, dtype=float))
+            reports[report] = frame
+        # Rule hits in the grid's order: by day, person, then rule
+        flagged = rows[rows["report"].isin(list(RULES))].assign(
+            rule=lambda frame: frame["report"].map({key: i for i, key in enumerate(RULES)}),
+            Provjera=lambda frame: frame["report"].map({key: rule.title for key, rule in RULES.items()}))
+        flagged = flagged.sort_values(["Full_Date", "order", "rule"], kind="stable")
+        reports["discrepancies"] = flagged[DISCREPANCY_COLUMNS].reset_index(drop=True)
+        return reports
+
+    def clear(self, scope=None):
+        """Forget every stored month (or those of one scope)."""
+        with self._transaction() as con:
+            for table in ("months", "facts", "checks"):
+                if scope is None:
+                    con.execute(f"DELETE FROM {table}")
+                else:
+                    con.execute(f"DELETE FROM {table} WHERE scope = ?", (scope,))
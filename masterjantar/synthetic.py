@@ -0,0 +1,220 @@
+"""Synthetic MasterTeam, Jantar and PN exports in the layouts the parsers read.
+
+The three exports describe the same made-up employees and month, with the
+usual mix of leave, sick days, business trips and a few real discrepancies.
+Usage:
+
+    python -m masterjantar.synthetic exports/synthetic --employees 1000 --period 2024-03
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from masterjantar.schemas import PN_COLUMNS
+
+FIRST_NAMES = ["Ana", "Ivan", "Marija", "Josip", "Petra", "Luka", "Ivana", "Marko", "Katarina", "Tomislav",
+               "Lucija", "Matej", "Nikolina", "Dario", "Mateja", "Željko", "Snježana", "Đuro", "Maša", "Krešimir"]
+LAST_NAMES = ["Horvat", "Kovačević", "Babić", "Marić", "Jurić", "Novak", "Kovačić", "Knežević", "Vuković",
+              "Marković", "Petrović", "Matić", "Tomić", "Pavlović", "Božić", "Grgić", "Šarić", "Đurić", "Perić"]
+DEPARTMENTS = ["Uprava", "Računovodstvo", "Proizvodnja", "Prodaja", "Informatika", "Logistika"]
+
+MASTERTEAM_DAY_NAMES = ["Po", "Ut", "Sr", "Če", "Pe", "Su", "Ne"]
+JANTAR_DAY_NAMES = ["Pon", "Uto", "Sri", "Čet", "Pet", "Sub", "Ned"]
+
+# Day status -> (MasterTeam value, Jantar Statistika, share of working days)
+WEEKEND, PRESENT, ANNUAL_LEAVE, SICK, TRAVEL, ABSENT, UNRECORDED = range(7)
+STATUSES = {
+    WEEKEND: (None, "Vikend", 0),
+    PRESENT: (8, "Prisutan", 0.885),
+    # Leave is away from the clock too; MasterTeam records it with a code instead of hours
+    ANNUAL_LEAVE: ("GO", "Odsutan", 0.05),
+    SICK: ("BO", "Odsutan", 0.03),
+    # Trips are placed separately; the traveller is away from the clock
+    TRAVEL: (8, "Odsutan", 0),
+    # Hours in MasterTeam but absent in Jantar, and present in Jantar without hours
+    ABSENT: (8, "Odsutan", 0.02),
+    UNRECORDED: (None, "Prisutan", 0.015),
+}
+# Share of working days spent on business trips, and of present days with a second session
+TRAVEL_SHARE = 0.03
+SECOND_SESSION_SHARE = 0.02
+
+# MasterTeam numbers people (Rbr) per department block, and the parser only keeps
+# Rbr up to 1000, so the people are written in blocks of at most this many
+MASTERTEAM_BLOCK = 1000
+
+# Bump when the generated exports change; the benchmark then regenerates its cached exports
+VERSION = 2
+
+WORKBOOK_OPTIONS = {"constant_memory": True, "default_date_format": "dd.mm.yyyy",
+                    "strings_to_formulas": False, "strings_to_urls": False}
+
+
+def employee_names(n, seed=0):
+    """n distinct upper-case "PREZIME IME" names (a number is added once the combinations run out)."""
+    rng = np.random.default_rng(seed)
+    pairs = len(FIRST_NAMES) * len(LAST_NAMES)
+    order = rng.permutation(max(n, pairs))[:n]
+    names = [f"{LAST_NAMES[i % pairs // len(FIRST_NAMES)]} {FIRST_NAMES[i % len(FIRST_NAMES)]}".upper()
+             for i in order]
+    return [name if i < pairs else f"{name} {i // pairs + 1}" for name, i in zip(names, order)]
+
+
+def month_plan(n, period, seed=0):
+    """What every employee does on every day of the period.
+
+    Returns the persons × days status codes, clock-in and clock-out hours,
+    second-session flags and the list of trips as (person, first day, last day).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(period.start_time, periods=period.days_in_month)
+    weekend = np.asarray(dates.dayofweek >= 5)
+
+    working = [code for code, (_, _, share) in STATUSES.items() if share]
+    shares = np.array([STATUSES[code][2] for code in working])
+    status = rng.choice(working, size=(n, len(dates)), p=shares / shares.sum()).astype(np.int8)
+    status[:, weekend] = WEEKEND
+
+    trips = []
+    for person in rng.choice(n, size=int(n * len(dates) * TRAVEL_SHARE / 2.5)):
+        first = int(rng.integers(len(dates)))
+        last = min(first + int(rng.integers(0, 4)), len(dates) - 1)
+        status[person, first:last + 1][~weekend[first:last + 1]] = TRAVEL
+        trips.append((int(person), first, last))
+
+    # Shifts start around 7:00 and last about eight hours, a few of them much longer or shorter
+    start = np.round((7 + rng.normal(0, 0.25, status.shape)) * 4) / 4
+    length = 8 + rng.choice([0, -2, 1.5], p=[0.96, 0.02, 0.02], size=status.shape) + rng.normal(0, 0.1, status.shape)
+    end = np.round((start + length) * 4) / 4
+    second = (rng.random(status.shape) < SECOND_SESSION_SHARE) & np.isin(status, [PRESENT, UNRECORDED])
+    return {"dates": dates, "status": status, "start": start, "end": end, "second": second, "trips": trips}
+
+
+def _clock(hours):
+    minutes = int(round(hours * 60)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def write_masterteam(target, names, period, plan):
+    dates = plan["dates"]
+    values = np.array([STATUSES[code][0] for code in range(len(STATUSES))], dtype=object)[plan["status"]]
+    header = [None, "Rbr", "PREZIME i IME",
+              *(f"{MASTERTEAM_DAY_NAMES[d.dayofweek]} {d.day}" for d in dates), "Ukupno"]
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    sheet = workbook.add_worksheet("MasterTeam")
+    sheet.write_row(0, 0, ["Evidencija radnog vremena"])
+    sheet.write_row(1, 0, [None, f"Razdoblje: {period.strftime('%m.%Y')}."])
+    sheet.write_row(3, 0, header)
+    row_number = 4
+    for i, (name, row) in enumerate(zip(names, values)):
+        if i % MASTERTEAM_BLOCK == 0:
+            # A department title row, without Rbr, opens every block
+            sheet.write_row(row_number, 0, [None, None, f"{DEPARTMENTS[i // MASTERTEAM_BLOCK % len(DEPARTMENTS)]} "
+                                                        f"{i // MASTERTEAM_BLOCK + 1}"])
+            row_number += 1
+        hours = sum(v for v in row if isinstance(v, int))
+        sheet.write_row(row_number, 0, [None, i % MASTERTEAM_BLOCK + 1, name, *row, hours])
+        row_number += 1
+    sheet.write_row(row_number, 0, [None, "Ukupno"])
+    workbook.close()
+
+
+def write_jantar(target, names, period, plan, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = plan["dates"]
+    status, start, end, second = plan["status"], plan["start"], plan["end"], plan["second"]
+    razdoblje = f"{dates[0]:%d.%m.%Y} - {dates[-1]:%d.%m.%Y}"
+    departments = rng.choice(DEPARTMENTS, size=len(names))
+
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    sheet = workbook.add_worksheet("Jantar")
+    row = 0
+
+    def write(*values):
+        nonlocal row
+        sheet.write_row(row, 0, values)
+        row += 1
+
+    write("Izvještaj o prisutnosti")
+    for i, name in enumerate(names):
+        # Jantar writes names with stray spaces and mixed case; the parser cleans them up
+        write("Korisnik", f" {name.title()} ")
+        write("Razdoblje", razdoblje)
+        write("Odjel", departments[i])
+        write("Raspored", "Jutarnji")
+        write("Kartica korisnika", 100000 + i)
+        write()
+        write("Dan", "Datum", "Početak", None, "Kraj", None, "Ukupno", "Statistika")
+        worked = 0.0
+        for d, date in enumerate(dates):
+            code = status[i, d]
+            day = (JANTAR_DAY_NAMES[date.dayofweek], f"{date:%d.%m.%Y}")
+            if code in (PRESENT, UNRECORDED):
+                hours = end[i, d] - start[i, d]
+                worked += hours
+                write(*day, _clock(start[i, d]), None, _clock(end[i, d]), None, _clock(hours), STATUSES[code][1])
+                if second[i, d]:
+                    worked += 2
+                    write(None, None, _clock(end[i, d] + 1), None, _clock(end[i, d] + 3), None, "02:00", None)
+            else:
+                write(*day, None, None, None, None, None, STATUSES[code][1])
+        write(None, None, None, None, "Vremenski razrez")
+        write("Suma", _clock(worked) if worked < 24 else f"{int(worked)}:{int(worked % 1 * 60):02d}")
+        write("Saldo za razdoblje", "0:00")
+        write("Radna obveza", f"{int((status[i] != WEEKEND).sum() * 8)}:00")
+        write("Prekovremeno", 0)
+        write("Godišnji", int((status[i] == ANNUAL_LEAVE).sum()))
+        write("Broj obroka", int(np.isin(status[i], [PRESENT, UNRECORDED]).sum()))
+        write("Statistika")
+        write("   ")
+        for label, codes in (("Prisutan", [PRESENT, UNRECORDED]), ("Godišnji odmor", [ANNUAL_LEAVE]),
+                             ("Bolovanje", [SICK]), ("Odsutan", [TRAVEL, ABSENT])):
+            write(label, int(np.isin(status[i], codes).sum()), None, None, None, "Ukupno")
+    workbook.close()
+
+
+def write_pn(target, names, period, plan):
+    dates = plan["dates"]
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    sheet = workbook.add_worksheet("Putni nalozi")
+    sheet.write_row(0, 0, ["Putni nalozi"])
+    sheet.write_row(1, 0, [f"Razdoblje: {period.strftime('%m.%Y')}."])
+    sheet.write_row(3, 0, PN_COLUMNS)
+    for i, (person, first, last) in enumerate(plan["trips"]):
+        departure = dates[first].to_pydatetime().replace(hour=7)
+        arrival = dates[last].to_pydatetime().replace(hour=18)
+        sheet.write_row(4 + i, 0, [f"{i + 1}/{period.year}", names[person], departure, arrival, "Sastanak"])
+    sheet.write_row(4 + len(plan["trips"]), 0, ["SVEUKUPNO"])
+    workbook.close()
+
+
+def generate(directory, employees, period, seed=0):
+    """Write masterteam.xlsx, jantar.xlsx and pn.xlsx for one month into directory; returns their paths."""
+    period = pd.Period(period, freq="M")
+    os.makedirs(directory, exist_ok=True)
+    names = employee_names(employees, seed)
+    plan = month_plan(employees, period, seed)
+    paths = {kind: os.path.join(directory, f"{kind}.xlsx") for kind in ("masterteam", "jantar", "pn")}
+    write_masterteam(paths["masterteam"], names, period, plan)
+    write_jantar(paths["jantar"], names, period, plan, seed)
+    write_pn(paths["pn"], names, period, plan)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m masterjantar.synthetic", description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="where to write masterteam.xlsx, jantar.xlsx and pn.xlsx")
+    parser.add_argument("-n", "--employees", type=int, default=100, help="headcount (default: 100)")
+    parser.add_argument("-p", "--period", default="2024-03", help="month as YYYY-MM (default: 2024-03)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    for path in generate(args.directory, args.employees, args.period, args.seed).values():
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+"""Filtering, sorting and paging of report frames for the app's result viewer.
+
+The report frames stay on the server; the app renders only the rows of the
+page being looked at. The filtered and sorted row order of a report is kept
+in view_cache, so turning pages does not filter and sort again.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from masterjantar.cache import ParseCache
+from masterjantar.output import _arrow_compatible
+from masterjantar.persons import normalize_name
+from masterjantar.rules import RULES
+
+PAGE_SIZE = 100
+NAME_COLUMN = "PREZIME i IME"
+DATE_COLUMN = "Full_Date"
+
+# Row orders of the report views being paged through
+view_cache = ParseCache(max_entries=16)
+
+
+def report_dates(frame):
+    """The distinct dates of a report, for picking one day."""
+    if DATE_COLUMN not in frame:
+        return []
+    return sorted(frame[DATE_COLUMN].dropna().unique())
+
+
+def _sort_key(values):
+    # Object columns mix numbers and text (e.g. 8 and "GO"); compare them as text
+    return values.astype(str) if values.dtype == object else values
+
+
+def report_view(frame, key=None, person=None, date=None, sort=None, descending=False):
+    """Row positions of the report filtered to a person and a date, in the sort order.
+
+    person matches any part of the name, without case, extra spaces or
+    diacritics. key identifies the frame; with it the positions are cached.
+    """
+    def compute():
+        mask = np.ones(len(frame), dtype=bool)
+        if person and NAME_COLUMN in frame:
+            # Normalize each distinct name once
+            codes, names = pd.factorize(frame[NAME_COLUMN])
+            needle = normalize_name(person) or ""
+            hits = np.array([needle in (normalize_name(name) or "") for name in names], dtype=bool)
+            mask &= np.append(hits, False)[codes]
+        if date is not None and DATE_COLUMN in frame:
+            mask &= (frame[DATE_COLUMN] == pd.Timestamp(date)).to_numpy()
+        positions = np.flatnonzero(mask)
+        if sort is not None:
+            values = frame[sort].iloc[positions].reset_index(drop=True)
+            order = values.sort_values(ascending=not descending, kind="stable", na_position="last",
+                                       key=_sort_key).index.to_numpy()
+            positions = positions[order]
+        return positions
+
+    if key is None:
+        return compute()
+    return view_cache.get_or_compute((key, person or None, date, sort, descending), compute)
+
+
+def page_count(rows, size=PAGE_SIZE):
+    return max(1, math.ceil(rows / size))
+
+
+def page(frame, positions, number, size=PAGE_SIZE):
+    """The rows of page number (from 1) of a report view, ready for st.dataframe."""
+    return _arrow_compatible(frame.iloc[positions[(number - 1) * size:number * size]])
+
+
+def summary_counts(reports):
+    """Rows per discrepancy type (rule title -> count), for the reports that have them."""
+    return {rule.title: len(reports[key]) for key, rule in RULES.items() if key in reports}
@@ -1,7 +1,10 @@
+from contextlib import nullcontext
+
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-import re
+
+from masterjantar import (DEFAULT_STORE_PATH, HOURS_TOLERANCE, REPORTS, MonthStore, available_formats, download_args, inputs_key,
+                          load_jantar, load_masterteam, load_pn, page, page_count, reconcile_files, reconcile_periods,
+                          recording, report_dates, report_view, summary_counts)
 
 st.title("🎈 Provjera sati")
 st.write("Provjeri sate rada.")
@@ -11,470 +14,244 @@ uploaded_masterteam = st.file_uploader("Učitajte MasterTeam evidenciju", type=[
 uploaded_jantar = st.file_uploader("Učitajte Jantar Team datoteku", type=["xls", "xlsx"])
 uploaded_pn = st.file_uploader("Učitajte datoteku službenih putovanja", type=["xls", "xlsx"])  # Upload instruction in Croatian
 
-# Process MasterTeam file
-if uploaded_masterteam is not None and st.button("Obradi MasterTeam"):
-    # df_master is loaded from the Excel file
-    df_master = pd.read_excel(uploaded_masterteam, header=3)
-    df_master = df_master.drop(columns=[df_master.columns[0]])
+# Excel for reading, Parquet / Arrow / CSV for loading into other systems
+output_format = st.selectbox("Format preuzetih datoteka", available_formats())
 
-    # Reset index after dropping rows to avoid index gaps
-    df_master = df_master.reset_index(drop=True)
+# Keep reconciled months on disk so that re-uploads during the month only re-check new or changed days
+use_store = st.checkbox("Zapamti obrađeni mjesec (ponovno provjeri samo nove i izmijenjene dane)")
 
-    # Remove rows where the "Rbr" column is not a number
-    df_master['Rbr'] = pd.to_numeric(df_master['Rbr'], errors='coerce')  # Convert "Rbr" to numeric, invalid entries become NaN
-    df_master = df_master.dropna(subset=['Rbr'])  # Drop rows where "Rbr" is NaN
+# Days whose hours clocked in Jantar differ from MasterTeam's by more than this are reported
+hours_tolerance = st.number_input("Dopušteno odstupanje sati (Jantar / MasterTeam)", min_value=0.0,
+                                  value=HOURS_TOLERANCE, step=0.25)
 
-    # Reset the index after dropping rows
-    df_master = df_master.reset_index(drop=True)
+# Off by default: comparing every unmatched name with the MasterTeam names takes time on large exports
+suggest_names = st.checkbox("Predloži slična imena iz MasterTeama za imena koja nisu pronađena")
 
-    # Drop rows where "Rbr" or any numeric columns are greater than 1000
-    df_master = df_master[df_master['Rbr'] <= 1000]
+# Off by default: measuring peak memory slows the run down
+show_stages = st.checkbox("Prikaži mjerenja obrade (vrijeme, broj redaka i memorija po koraku)")
 
-    # Reset the index after dropping rows
-    df_master = df_master.reset_index(drop=True)
 
-    # Drop columns with names that contain "Unnamed" or are blank
-    df_master = df_master.loc[:, ~df_master.columns.str.contains('^Unnamed|^$', na=False)]
+def show_stage_log(stage_log):
+    # Files already parsed (cached) are not parsed again and have no parse rows
+    if stage_log is not None:
+        with st.expander("⏱️ Mjerenja obrade"):
+            st.dataframe(stage_log.to_frame(), hide_index=True)
 
-    # Reset the index after dropping the columns
-    df_master = df_master.reset_index(drop=True)
 
-    # Identify unique persons based on the first two columns (Rbr and PREZIME i IME)
-    personal_data_columns = ["Rbr", "PREZIME i IME"]
+def show_name_checks(reports):
+    # MasterTeam people whose names differ only in diacritics, and names MasterTeam does not have
+    name_clashes = reports["name_clashes"]
+    if not name_clashes.empty:
+        st.warning("MasterTeam ima različite osobe čija se imena razlikuju samo u dijakriticima; Jantar i "
+                   "putni nalozi povezuju se s njima samo po točnom imenu: "
+                   + ", ".join(name_clashes["PREZIME i IME"]))
+    unmatched_names = reports["unmatched_names"]
+    if not unmatched_names.empty:
+        with st.expander(f"⚠️ Imena koja nisu pronađena u MasterTeamu ({len(unmatched_names)})"):
+            st.write(unmatched_names)
 
-    # Extract only the day columns (Su 1 to Pe 31)
-    day_columns = [col for col in df_master.columns if any(str(i) in col for i in range(1, 32))]
 
-    # Melt the day columns into rows (long format)
-    melted_master = pd.melt(df_master, id_vars=personal_data_columns, value_vars=day_columns,
-                        var_name="Day", value_name="Value")
+def show_summary(reports):
+    # Discrepancies per check, so the reports can be navigated without rendering them
+    counts = {**summary_counts(reports), "Spojeno redaka": len(reports["merged"])}
+    for column, (title, count) in zip(st.columns(len(counts)), counts.items()):
+        column.metric(title, count)
 
-    # Clean up the "Day" column to only include the day number (e.g., '1', '2', etc.)
-    melted_master['Day'] = melted_master['Day'].str.extract('(\d+)')
 
-    # Save as Excel
-    output_master = BytesIO()
-    with pd.ExcelWriter(output_master, engine='xlsxwriter') as writer:
-        melted_master.to_excel(writer, index=False, sheet_name="MasterTeam")
-    output_master.seek(0)
+def show_report(frame, view_key):
+    """One page of a report, filtered and sorted on the server; only that page is sent to the browser."""
+    if frame.empty:
+        st.write("⚠️ Filtered report is empty!")
+        return
+    person_column, date_column, sort_column, order_column = st.columns([3, 2, 2, 1])
+    person = person_column.text_input("Osoba", key=f"{view_key} person")
+    date = date_column.selectbox("Datum", [None, *report_dates(frame)], key=f"{view_key} date",
+                                 format_func=lambda d: "Svi datumi" if d is None else f"{d:%d.%m.%Y}")
+    sort = sort_column.selectbox("Poredaj po", [None, *frame.columns], key=f"{view_key} sort",
+                                 format_func=lambda c: "—" if c is None else str(c))
+    descending = order_column.checkbox("Silazno", key=f"{view_key} descending")
+
+    positions = report_view(frame, view_key, person, date, sort, descending)
+    pages = page_count(len(positions))
+    # A new filter or order starts again from the first page
+    number = st.number_input(f"Stranica (od {pages}, ukupno {len(positions)} redaka)", min_value=1,
+                             max_value=pages, value=1, key=f"{view_key} page {person} {date} {sort} {descending}")
+    st.dataframe(page(frame, positions, number), hide_index=True)
+
+# Process MasterTeam file
+if uploaded_masterteam is not None and st.button("Obradi MasterTeam"):
+    # Parse the upload (reused from the cache when the same file was already processed)
+    _, melted_master = load_masterteam(uploaded_masterteam)
 
-    # Download button
-    st.download_button("Preuzmite obrađenu MasterTeam datoteku", data=output_master,
-                       file_name="transformed_masterteam.xlsx", mime="application/vnd.ms-excel")
+    # Download button; the file is only written when the button is clicked
+    st.download_button("Preuzmite obrađenu MasterTeam datoteku",
+                       **download_args(inputs_key(uploaded_masterteam.getvalue()), "masterteam",
+                                       "transformed_masterteam.xlsx", {"MasterTeam": melted_master}, output_format))
 
 
 # Process Jantar file
 # ---- PROCESS JANTAR FILE ----
 if uploaded_jantar and st.button("Obradi Jantar"):
-    df_J = pd.read_excel(uploaded_jantar, header=None)
-
-    metadata = {}
-    all_data = []
-    current_section = None
-
-    # Loop through rows
-    for index, row in df_J.iterrows():
-        first_col = str(row.iloc[0]).strip()
-        print(first_col)
-        second_col = row.iloc[1] if len(row) > 1 else None
-
-        if first_col in ["Korisnik", "Razdoblje", "Odjel", "Raspored", "Kartica korisnika"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Suma", "Saldo za razdoblje", "Radna obveza"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Prekovremeno", "Stimulacija", "Stanje", "Prijenos", "Godišnji", "Stari godišnji",
-                           "Dvokratni rad", "Broj obroka", "Broj prijevoza"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Statistika", "Vrijeme", "Ukupno", "Vremenski razrez", "Vrijeme", ""]:
-            continue  # Skip these
-        # Ignore rows where "Vremenski razrez" is in the 5th column, "Vrijeme" is in the 5th column, 
-        # or "Ukupno" is in the 6th column (as they are not part of the actual data section)
-        elif row.iloc[4] in ["Vremenski razrez", "Vrijeme"] or row.iloc[5] == "Ukupno":
-            continue  # Skip these rows as they are not part of the actual data
-        
-        elif not first_col:
-            continue
-        elif first_col == "Dan":
-            current_section = {**metadata}
-            continue
-        elif current_section:
-            row_data = row.tolist()
-            while len(row_data) < 8:
-                row_data.append(None)
-
-            if all(x is None or pd.isna(x) for x in row_data[:8]):
-                continue
-
-            combined_row = {
-                **current_section,
-                "Dan": row_data[0],
-                "Datum": row_data[1],
-                "Početak": row_data[2],
-                "Unnamed 1": row_data[3],
-                "Kraj": row_data[4],
-                "Unnamed 2": row_data[5],
-                "Ukupno": row_data[6],
-                "Statistika": row_data[7]
-            }
-            all_data.append(combined_row)
-
-    df_J_cleaned = pd.DataFrame(all_data)
-    df_J_cleaned['Korisnik'] = df_J_cleaned['Korisnik'].str.strip().str.upper()
-    df_J_cleaned['Datum'] = df_J_cleaned['Datum'].fillna(method='ffill')
-
-    # Save & Download
-    output_jantar = BytesIO()
-    with pd.ExcelWriter(output_jantar, engine='xlsxwriter') as writer:
-        df_J_cleaned.to_excel(writer, index=False, sheet_name="Jantar")
-    output_jantar.seek(0)
-
-    st.download_button("Preuzmite obrađenu Jantar datoteku", data=output_jantar,
-                       file_name="transformed_jantar.xlsx", mime="application/vnd.ms-excel")
+    # Export the Jantar data in its original wide layout (metadata on every daily row)
+    df_J_cleaned = load_jantar(uploaded_jantar).to_wide()
+
+    # Download (written on click)
+    st.download_button("Preuzmite obrađenu Jantar datoteku",
+                       **download_args(inputs_key(uploaded_jantar.getvalue()), "jantar",
+                                       "transformed_jantar.xlsx", {"Jantar": df_J_cleaned}, output_format))
 
 if uploaded_pn is not None and st.button("Obradite datoteku putnih naloga"):  # Combine the file upload and button click
-    # Load the uploaded Excel file and skip the first 3 rows
-    df_pn = pd.read_excel(uploaded_pn, header=3)
-
-    # Remove the "SVEUKUPNO" rows
-    df_pn = df_pn[df_pn['Broj PN\n'] != 'SVEUKUPNO']
-
-    # Convert 'Dat. Polaska' and 'Dat. Povratka' to datetime format (if they are not already in datetime format)
-    df_pn["Dat. Polaska"] = pd.to_datetime(df_pn["Dat. Polaska"], errors='coerce')
-    df_pn["Dat. Povratka"] = pd.to_datetime(df_pn["Dat. Povratka"], errors='coerce')
-
-    # Expand each row into multiple rows for each day in the GO period
-    expanded_rows = []
-    for _, row in df_pn.iterrows():
-        # Generate all dates between 'Dat. Polaska' and 'Dat. Povratka'
-        if pd.notna(row["Dat. Polaska"]) and pd.notna(row["Dat. Povratka"]):
-            date_range = pd.date_range(row["Dat. Polaska"], row["Dat. Povratka"])  # Generate all dates
-            for date in date_range:
-                expanded_rows.append({
-                    "Prezime Ime": row['Prezime i ime'],  # Use the correct column name
-                    "Datum": date.strftime("%d.%m.%Y"),
-                    "Razlog odsutnosti": row["Zadatak službenog puta"]
-                })
-
-    # Convert the list of rows into a DataFrame
-    df_expanded = pd.DataFrame(expanded_rows)
-
-    # Provide a download button for the processed Excel file
-    output_pn = BytesIO()
-    with pd.ExcelWriter(output_pn, engine='xlsxwriter') as writer:
-        df_expanded.to_excel(writer, index=False, sheet_name="Processed Data")
-    output_pn.seek(0)
-
-    # Provide a download button for the processed data
+    # Expand each travel order into one row per day it covers
+    df_expanded = load_pn(uploaded_pn)
+
+    # Provide a download button for the processed data (Excel dates are written as dd.mm.yyyy)
     st.download_button(
         label="Preuzmite obrađenu datoteku putnih naloga",  # Download instruction in Croatian
-        data=output_pn,
-        file_name="processed_pn_data.xlsx",
-        mime="application/vnd.ms-excel"
+        **download_args(inputs_key(uploaded_pn.getvalue()), "pn", "processed_pn_data.xlsx",
+                        {"Processed Data": df_expanded}, output_format)
     )
 
 # Check if all three files are uploaded and the button is clicked
-if uploaded_masterteam is not None and uploaded_jantar is not None and uploaded_pn is not None and st.button('Spoji podatke i pripremi izvještaj'):
-    # Load the Excel file without specifying the header
-    df_raw = pd.read_excel(uploaded_masterteam, header=None)  # Load without setting header
-
-    # Extract the text from row 2 (index 1), second column (index 1)
-    row_2_text = df_raw.iloc[1, 1]  # Row 2 (index 1), second column (index 1)
-
-    # Print the raw text to debug the content
-    print(f"Row 2, Column 2 content: '{row_2_text}'")
-
-    # Clean the text by stripping extra spaces or special characters
-    cleaned_text = str(row_2_text).strip()
-
-    # Use regular expression to extract MM.YYYY. format (with dot after year)
-    month_year_match = re.search(r'(\d{2})\.(\d{4})\.', cleaned_text)
-
-    if month_year_match:
-        month_MT = month_year_match.group(1)  # Extracted month
-        year_MT = month_year_match.group(2)   # Extracted year
-#     print(f"Month: {month}, Year: {year}")
-
-    
-    df_master = pd.read_excel(uploaded_masterteam, header=3)
-    # df_master is loaded from the Excel file
-    df_master = df_master.drop(columns=[df_master.columns[0]])
-
-    # Reset index after dropping rows to avoid index gaps
-    df_master = df_master.reset_index(drop=True)
-
-    # Remove rows where the "Rbr" column is not a number
-    df_master['Rbr'] = pd.to_numeric(df_master['Rbr'], errors='coerce')  # Convert "Rbr" to numeric, invalid entries become NaN
-    df_master = df_master.dropna(subset=['Rbr'])  # Drop rows where "Rbr" is NaN
-
-    # Reset the index after dropping rows
-    df_master = df_master.reset_index(drop=True)
-
-    # Drop rows where "Rbr" or any numeric columns are greater than 1000
-    df_master = df_master[df_master['Rbr'] <= 1000]
-
-    # Reset the index after dropping rows
-    df_master = df_master.reset_index(drop=True)
-
-    # Drop columns with names that contain "Unnamed" or are blank
-    df_master = df_master.loc[:, ~df_master.columns.str.contains('^Unnamed|^$', na=False)]
-
-    # Reset the index after dropping the columns
-    df_master = df_master.reset_index(drop=True)
-
-    # Identify unique persons based on the first two columns (Rbr and PREZIME i IME)
-    personal_data_columns = ["Rbr", "PREZIME i IME"]
-
-    # Extract only the day columns (Su 1 to Pe 31)
-    day_columns = [col for col in df_master.columns if any(str(i) in col for i in range(1, 32))]
-
-    # Melt the day columns into rows (long format)
-    melted_master = pd.melt(df_master, id_vars=personal_data_columns, value_vars=day_columns,
-                        var_name="Day", value_name="Value")
-
-    # Clean up the "Day" column to only include the day number (e.g., '1', '2', etc.)
-    melted_master['Day'] = melted_master['Day'].str.extract('(\d+)')
-
-    # The melted_master dataframe is now ready for further processing
-
-
-    # Extract columns
-    personal_data_columns = ["Rbr", "PREZIME i IME"]
-    day_columns = [col for col in df_master.columns if any(str(i) in col for i in range(1, 32))]
-    
-    # Reshape data
-    melted_master = pd.melt(df_master, id_vars=personal_data_columns, value_vars=day_columns,
-                            var_name="Day", value_name="Value")
-    melted_master['Day'] = melted_master['Day'].str.extract('(\d+)')
-    #transform Jantar data
-    df_J = pd.read_excel(uploaded_jantar, header=None)
-
-    metadata = {}
-    all_data = []
-    current_section = None
-
-    # Loop through rows
-    for index, row in df_J.iterrows():
-        first_col = str(row.iloc[0]).strip()
-        second_col = row.iloc[1] if len(row) > 1 else None
-
-        if first_col in ["Korisnik", "Razdoblje", "Odjel", "Raspored", "Kartica korisnika"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Suma", "Saldo za razdoblje", "Radna obveza"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Prekovremeno", "Stimulacija", "Stanje", "Prijenos", "Godišnji", "Stari godišnji",
-                           "Dvokratni rad", "Broj obroka", "Broj prijevoza"]:
-            metadata[first_col] = second_col
-        elif first_col in ["Statistika", "Vrijeme", "Ukupno", "Vremenski razrez", "Vrijeme"]:
-            continue  # Skip these
-        elif not first_col:
-            continue
-        elif row.iloc[4] in ["Vremenski razrez", "Vrijeme"] or row.iloc[5] == "Ukupno":
-            continue  # Skip these rows as they are not part of the actual data
-        
-        elif first_col == "Dan":
-            current_section = {**metadata}
-            continue
-        elif current_section:
-            row_data = row.tolist()
-            while len(row_data) < 8:
-                row_data.append(None)
-
-            if all(x is None or pd.isna(x) for x in row_data[:8]):
-                continue
-
-            combined_row = {
-                **current_section,
-                "Dan": row_data[0],
-                "Datum": row_data[1],
-                "Početak": row_data[2],
-                "Unnamed 1": row_data[3],
-                "Kraj": row_data[4],
-                "Unnamed 2": row_data[5],
-                "Ukupno": row_data[6],
-                "Statistika": row_data[7]
-            }
-            all_data.append(combined_row)
-
-    df_J_cleaned = pd.DataFrame(all_data)
-    df_J_cleaned['Korisnik'] = df_J_cleaned['Korisnik'].str.strip().str.upper()
-    df_J_cleaned['Datum'] = df_J_cleaned['Datum'].fillna(method='ffill')
-    
-    # Load the uploaded Excel file and skip the first 3 rows
-    df_pn = pd.read_excel(uploaded_pn, header=3)
-
-    # Remove the "SVEUKUPNO" rows
-    df_pn = df_pn[df_pn['Broj PN\n'] != 'SVEUKUPNO']
-
-    # Convert 'Dat. Polaska' and 'Dat. Povratka' to datetime format (if they are not already in datetime format)
-    df_pn["Dat. Polaska"] = pd.to_datetime(df_pn["Dat. Polaska"], errors='coerce')
-    df_pn["Dat. Povratka"] = pd.to_datetime(df_pn["Dat. Povratka"], errors='coerce')
-
-    # Expand each row into multiple rows for each day in the GO period
-    expanded_rows = []
-    for _, row in df_pn.iterrows():
-        # Generate all dates between 'Dat. Polaska' and 'Dat. Povratka'
-        if pd.notna(row["Dat. Polaska"]) and pd.notna(row["Dat. Povratka"]):
-            date_range = pd.date_range(row["Dat. Polaska"], row["Dat. Povratka"])  # Generate all dates
-            for date in date_range:
-                expanded_rows.append({
-                    "Prezime Ime": row['Prezime i ime'],  # Use the correct column name
-                    "Datum": date.strftime("%d.%m.%Y"),
-                    "Razlog odsutnosti": row["Zadatak službenog puta"]
-                })
-
-    # Convert the list of rows into a DataFrame
-    df_expanded = pd.DataFrame(expanded_rows)
-
-    # Ensure 'Datum' in df_J_cleaned is in datetime format
-    df_J_cleaned["Datum"] = pd.to_datetime(df_J_cleaned["Datum"], dayfirst=True)
-
-    # Convert year and month to integers to avoid decimal points in the date string
-    year = int(df_J_cleaned["Datum"].dt.year.iloc[0])
-    month = int(df_J_cleaned["Datum"].dt.month.iloc[0])
-
-    # Create a full date in melted_data by combining year, month, and "Day"
-    melted_master["Full_Date"] = pd.to_datetime(melted_master["Day"].astype(str) + f"-{month_MT}-{year_MT}", format="%d-%m-%Y")
-
-    # Merge both DataFrames on Employee Name and Date
-    merged_df = melted_master.merge(df_J_cleaned, left_on=["PREZIME i IME", "Full_Date"], right_on=["Korisnik", "Datum"], how="left")
-
-    # Convert both columns to datetime format
-    df_expanded["Datum"] = pd.to_datetime(df_expanded["Datum"], dayfirst=True, errors="coerce")
-    merged_df["Full_Date"] = pd.to_datetime(merged_df["Full_Date"], dayfirst=True, errors="coerce")
-
-    # Now merge the dataframes
-    merged_result = pd.merge(
-        merged_df, df_expanded,
-        left_on=["PREZIME i IME", "Full_Date"],
-        right_on=["Prezime Ime", "Datum"],
-        how="outer"
-    )
-    # Keep only the required columns
-    merged_result = merged_result[["PREZIME i IME", "Full_Date", "Razlog odsutnosti", "Value", "Statistika"]]
-    # Rename columns in merged_result_copy
-    merged_result = merged_result.rename(columns={
-        "Razlog odsutnosti": "Konto",
-        "Value": "MasterTeam",
-        "Statistika": "Jantar"
-    })  
+all_uploaded = uploaded_masterteam is not None and uploaded_jantar is not None and uploaded_pn is not None
+if all_uploaded and st.button('Spoji podatke i pripremi izvještaj'):
+    # Parse the three uploads (reusing frames already parsed by the buttons above)
+    # and reconcile them with the same code the batch command line uses
+    with recording(memory=True) if show_stages else nullcontext() as stage_log:
+        try:
+            reports = reconcile_files(uploaded_masterteam, uploaded_jantar, uploaded_pn,
+                                      store=MonthStore(DEFAULT_STORE_PATH) if use_store else None,
+                                      hours_tolerance=hours_tolerance, suggest_names=suggest_names)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+    # Kept in the session: paging and filtering the reports reruns the script without reconciling again
+    st.session_state["combined"] = {
+        "inputs": inputs_key(uploaded_masterteam.getvalue(), uploaded_jantar.getvalue(), uploaded_pn.getvalue()),
+        "reports": {key: value for key, value in reports.items() if key != "grid"},
+        "hours_tolerance": hours_tolerance,
+        "stage_log": stage_log,
+    }
+
+combined = st.session_state.get("combined")
+if all_uploaded and combined is not None and combined["inputs"] == inputs_key(
+        uploaded_masterteam.getvalue(), uploaded_jantar.getvalue(), uploaded_pn.getvalue()):
+    # Downloads below are only written when clicked, and reused until the uploads change
+    inputs, reports, tolerance = combined["inputs"], combined["reports"], combined["hours_tolerance"]
+    show_stage_log(combined["stage_log"])
+
+    if "changed_days" in reports:
+        st.caption(f"Ponovno provjereno dana (po osobi): {reports['changed_days']}")
+
+    show_name_checks(reports)
+
+    show_summary(reports)
+
+    merged_result = reports["merged"]
     # Display the merged result
-    st.write(merged_result)
-        
-    # Allow downloading the merged data
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        merged_result.to_excel(writer, index=False, sheet_name="Merged Report")
-    output.seek(0)
+    show_report(merged_result, f"{inputs} merged")
 
+    # Allow downloading the merged data
+    sheet_name, file_name = REPORTS["merged"]
     st.download_button(
         label="Preuzmi spojene tablice",
-        data=output,
-        file_name="merged_report.xlsx",
-        mime="application/vnd.ms-excel"
-    )   
-
-    # First report (1. Odsutni prema Jantaru)
-
-    # Make a copy of the merged_result to preserve the original DataFrame
-    merged_result_copy = merged_result.copy()
-
-    # Filter merged_result_copy to take the first non-null value for 'Statistika' for each person and date
-    merged_result_copy['Statistika'] = merged_result_copy.groupby(['PREZIME i IME', 'Full_Date'])['Statistika'].transform(
-        lambda x: x.dropna().iloc[0] if not x.dropna().empty else None
+        **download_args(inputs, "merged", file_name, {sheet_name: merged_result}, output_format)
     )
 
-    # Filter 'Statistika' to include only 'Odsutan' or no value (NaN)
-    filtered_report_1 = merged_result_copy[
-        (merged_result_copy['Statistika'] == 'Odsutan') | 
-        (merged_result_copy['Statistika'].isna())
-    ]
-
-    # Convert 'Value' column to numeric, setting errors='coerce' to turn non-numeric values into NaN
-    filtered_report_1['Value'] = pd.to_numeric(filtered_report_1['Value'], errors='coerce')
-    # Filter 'Razlog odsutnosti' to be NaN
-    filtered_report_1 = filtered_report_1[filtered_report_1['Razlog odsutnosti'].isna()]
-    # Filter 'Value' to be numeric (remove NaN values)
-    filtered_report_1 = filtered_report_1[filtered_report_1['Value'].notna()]
-    # Get the last date in df_J_cleaned
-    last_date_in_jantar = df_J_cleaned['Datum'].max()
-
-    # Filter 'Full_Date' to be less than or equal to the max date from df_J_cleaned
-    filtered_report_1 = filtered_report_1[filtered_report_1['Full_Date'] <= last_date_in_jantar]
-    # Rename columns in filtered_report_1
-    filtered_report_1 = filtered_report_1.rename(columns={
-        "Razlog odsutnosti": "Konto",
-        "Value": "MasterTeam",
-        "Statistika": "Jantar"
-    })
+    # First report (1. Odsutni prema Jantaru): hours in MasterTeam, but absent
+    # or missing in Jantar and not on a travel order, up to the last Jantar date
+    filtered_report_1 = reports["absent_per_jantar"]
+
     # Display filtered report 1
-    if filtered_report_1.empty:
-        st.write("⚠️ Filtered report is empty!")
-    st.write(filtered_report_1)
+    show_report(filtered_report_1, f"{inputs} absent_per_jantar")
 
     # Allow downloading the filtered report 1
-    output_filtered_1 = BytesIO()
-    with pd.ExcelWriter(output_filtered_1, engine='xlsxwriter') as writer:
-        filtered_report_1.to_excel(writer, index=False, sheet_name="1. Odsutni prema Jantaru")
-    output_filtered_1.seek(0)
-
+    sheet_name, file_name = REPORTS["absent_per_jantar"]
     st.download_button(
         label="Preuzmi 1. Odsutni prema Jantaru",
-        data=output_filtered_1,
-        file_name="1. Odsutni prema Jantaru.xlsx",
-        mime="application/vnd.ms-excel"
+        **download_args(inputs, "absent_per_jantar", file_name, {sheet_name: filtered_report_1}, output_format)
     )
-    # Second report (1. Odsutni prema MasterTeam)
-
-    # Filter merged_result to take the first non-null value for 'Statistika' for each person and date
-    #merged_result['Statistika'] = merged_result.groupby(['PREZIME i IME', 'Full_Date'])['Statistika'].transform(
-    #    lambda x: x.dropna().iloc[0] if not x.dropna().empty else None
-    #)
-
-    # Get the last date in df_J_cleaned (same as in the first report)
-    last_date_in_jantar = df_J_cleaned['Datum'].max()
-
-    filtered_report_2 = merged_result[
-        (merged_result['Statistika'].notna()) &  # Statistika must not be NaN
-        (merged_result['Statistika'] != 'Odsutan') &  # Statistika must not be 'Odsutan'
-        (merged_result['Statistika'] != 'Vikend') # Statistika must not be Vikend
-    ]
-
-    # Keep only non-numeric values in 'Value'
-    # We use `apply(pd.to_numeric, errors='coerce')` to attempt converting the 'Value' to numeric,
-    # and keep the original non-numeric values by filtering rows where the converted value is NaN.
-    filtered_report_2['Value_is_numeric'] = pd.to_numeric(filtered_report_2['Value'], errors='coerce').notna()
-
-    # Filter rows where 'Value' is not numeric (the conversion resulted in NaN)
-    filtered_report_2_non_numeric_value = filtered_report_2[~filtered_report_2['Value_is_numeric']]
-
-    # Get the last date in df_J_cleaned
-    last_date_in_jantar = df_J_cleaned['Datum'].max()
-
-    # Filter 'Full_Date' to be less than or equal to the max date from df_J_cleaned
-    filtered_report_2_non_numeric_value = filtered_report_2_non_numeric_value[
-        filtered_report_2_non_numeric_value['Full_Date'] <= last_date_in_jantar
-    ]
-    # Rename columns in filtered_report_2
-    filtered_report_2 = filtered_report_2.rename(columns={
-        "Razlog odsutnosti": "Konto",
-        "Value": "MasterTeam",
-        "Statistika": "Jantar"
-    })
+    # Second report (1. Odsutni prema MasterTeam): present in Jantar (not
+    # 'Odsutan' or 'Vikend') but without hours in MasterTeam
+    filtered_report_2 = reports["absent_per_masterteam"]
 
     # Display filtered report 2
-    if filtered_report_2_non_numeric_value.empty:
-        st.write("⚠️ Filtered report is empty!")
-    st.write(filtered_report_2_non_numeric_value)
+    show_report(filtered_report_2, f"{inputs} absent_per_masterteam")
 
     # Allow downloading the filtered report 2
-    output_filtered_2 = BytesIO()
-    with pd.ExcelWriter(output_filtered_2, engine='xlsxwriter') as writer:
-        filtered_report_2_non_numeric_value.to_excel(writer, index=False, sheet_name="1. Odsutni prema MasterTeam")
-    output_filtered_2.seek(0)
-
+    sheet_name, file_name = REPORTS["absent_per_masterteam"]
     st.download_button(
         label="Preuzmi 1. Odsutni prema MasterTeamu",
-        data=output_filtered_2,
-        file_name="1. Odsutni prema MasterTeam.xlsx",
-        mime="application/vnd.ms-excel"
-    )
\ No newline at end of file
+        **download_args(inputs, "absent_per_masterteam", file_name, {sheet_name: filtered_report_2}, output_format)
+    )
+
+    # Second report (2. Razlika u satima): hours clocked in Jantar (Početak to
+    # Kraj, all sessions of the day) differ from the MasterTeam hours
+    hours_report = reports["hours_mismatch"]
+    show_report(hours_report, f"{inputs} hours_mismatch {tolerance}")
+    sheet_name, file_name = REPORTS["hours_mismatch"]
+    st.download_button(
+        label="Preuzmi 2. Razlika u satima",
+        **download_args(inputs, f"hours_mismatch {tolerance}", file_name, {sheet_name: hours_report},
+                        output_format)
+    )
+
+    # Every discrepancy found by the checks in one table, tagged with the check (Provjera)
+    discrepancies = reports["discrepancies"]
+    show_report(discrepancies, f"{inputs} discrepancies {tolerance}")
+    sheet_name, file_name = REPORTS["discrepancies"]
+    st.download_button(
+        label="Preuzmi sva odstupanja",
+        **download_args(inputs, f"discrepancies {tolerance}", file_name, {sheet_name: discrepancies},
+                        output_format)
+    )
+
+    # All the reports as the sheets of a single workbook (a zip of files in the other formats)
+    st.download_button(
+        label="Preuzmi sve izvještaje (jedna datoteka)",
+        **download_args(inputs, f"all {tolerance}", "izvjestaji.xlsx",
+                        {sheet_name: reports[key] for key, (sheet_name, _) in REPORTS.items()}, output_format)
+    )
+
+# ---- SEVERAL MONTHS (QUARTER, YEAR TO DATE) ----
+st.header("Više mjeseci")
+st.write("Učitajte MasterTeam i Jantar datoteke za više mjeseci (jednu po mjesecu) i datoteke putnih naloga.")
+uploaded_masterteams = st.file_uploader("MasterTeam evidencije", type=["xls", "xlsx"], accept_multiple_files=True)
+uploaded_jantars = st.file_uploader("Jantar Team datoteke", type=["xls", "xlsx"], accept_multiple_files=True)
+uploaded_pns = st.file_uploader("Datoteke službenih putovanja", type=["xls", "xlsx"], accept_multiple_files=True)
+period_spec = st.text_input("Razdoblje (npr. 2024, 2024-Q1, 2024-01:2024-06, ytd; prazno = sve)")
+
+if uploaded_masterteams and uploaded_jantars and uploaded_pns:
+    period_inputs = inputs_key(*(f.getvalue() for f in [*uploaded_masterteams, *uploaded_jantars, *uploaded_pns]))
+    if st.button("Pripremi izvještaj za više mjeseci"):
+        # Every month is joined and checked on its own, then the monthly reports are stacked
+        with recording(memory=True) if show_stages else nullcontext() as stage_log:
+            try:
+                reports = reconcile_periods(uploaded_masterteams, uploaded_jantars, uploaded_pns, period_spec or None,
+                                            store=MonthStore(DEFAULT_STORE_PATH) if use_store else None,
+                                            hours_tolerance=hours_tolerance, suggest_names=suggest_names)
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+        st.session_state["periods"] = {"inputs": period_inputs, "reports": reports,
+                                       "hours_tolerance": hours_tolerance, "stage_log": stage_log}
+
+    periods = st.session_state.get("periods")
+    if periods is not None and periods["inputs"] == period_inputs:
+        reports, tolerance = periods["reports"], periods["hours_tolerance"]
+        show_stage_log(periods["stage_log"])
+
+        st.write(reports["by_period"])
+        show_name_checks(reports)
+
+        show_summary(reports)
+        for key, (sheet_name, _) in REPORTS.items():
+            st.subheader(sheet_name)
+            show_report(reports[key], f"{period_inputs} {reports['period']} {tolerance} {key}")
+
+        st.download_button(
+            label="Preuzmi sve izvještaje (jedna datoteka)",
+            **download_args(period_inputs, f"periods {reports['period']} {tolerance}",
+                            f"izvjestaji {reports['period']}.xlsx",
+                            {sheet_name: reports[key] for key, (sheet_name, _) in REPORTS.items()}, output_format)
+        )
@@ -0,0 +1,43 @@
+"""Small hand-written MasterTeam, Jantar and PN frames for one month, as the parsers return them."""
+import pandas as pd
+
+from masterjantar.jantar import parse_jantar_sections
+
+PERIOD = pd.Period("2024-03", freq="M")
+
+
+def masterteam(values):
+    """A melted MasterTeam frame from {name: {day: value}}."""
+    rows = [(float(rbr), name, str(day), value)
+            for rbr, (name, days) in enumerate(values.items(), 1) for day, value in days.items()]
+    return pd.DataFrame(rows, columns=["Rbr", "PREZIME i IME", "Day", "Value"])
+
+
+def jantar(sessions):
+    """A parsed Jantar export from {name: {day: (Početak, Kraj, Statistika)}}.
+
+    A day given a list of such tuples has several sessions; as in Jantar, only
+    the first of them names the day and its date.
+    """
+    rows = []
+    for name, days in sessions.items():
+        rows += [["Korisnik", name], ["Razdoblje", "01.03.2024 - 31.03.2024"],
+                 ["Dan", "Datum", "Početak", None, "Kraj", None, "Ukupno", "Statistika"]]
+        for day, day_sessions in days.items():
+            if not isinstance(day_sessions, list):
+                day_sessions = [day_sessions]
+            for i, (start, end, status) in enumerate(day_sessions):
+                dated = ["Pon", f"{day:02d}.03.2024"] if i == 0 else [None, None]
+                rows.append([*dated, start, None, end, None, None, status])
+    return parse_jantar_sections(pd.DataFrame(rows, columns=range(8)))
+
+
+def pn(trips):
+    """An expanded PN frame from {name: [day, ...]}."""
+    rows = [(name, PERIOD.start_time + pd.Timedelta(days=day - 1), "Sastanak")
+            for name, days in trips.items() for day in days]
+    return pd.DataFrame(rows, columns=["Prezime Ime", "Datum", "Razlog odsutnosti"])
+
+
+def present(days, start="07:00", end="15:00"):
+    return {day: (start, end, "Prisutan") for day in days}
@@ -0,0 +1,23 @@
+"""Triplet discovery of the batch command."""
+from masterjantar.batch import find_triplets
+
+
+def make_triplet(directory):
+    directory.mkdir(parents=True)
+    for kind in ("MasterTeam", "Jantar", "PN"):
+        (directory / f"{kind}.xlsx").touch()
+
+
+def test_triplets_named_by_directory(tmp_path):
+    make_triplet(tmp_path / "2024-02")
+    make_triplet(tmp_path / "2024-03")
+    triplets = find_triplets([str(tmp_path / "2024-*")])
+    assert [name for name, _ in triplets] == ["2024-02", "2024-03"]
+
+
+def test_same_directory_names_get_their_paths(tmp_path):
+    make_triplet(tmp_path / "deptA" / "2024-03")
+    make_triplet(tmp_path / "deptB" / "2024-03")
+    triplets = find_triplets([str(tmp_path / "*" / "2024-03")])
+    assert [name for name, _ in triplets] == ["deptA/2024-03", "deptB/2024-03"]
+    assert triplets[1][1]["jantar"] == str(tmp_path / "deptB" / "2024-03" / "Jantar.xlsx")
@@ -0,0 +1,70 @@
+"""Clocked hours from Jantar's Početak and Kraj, and the hours check built on them."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from masterjantar.grid import MonthGrid
+from masterjantar.jantar import clock_hours, open_sessions, worked_hours
+from masterjantar.rules import HOURS_TOLERANCE
+from tests.months import PERIOD, jantar, masterteam, pn
+
+
+@pytest.mark.parametrize("value, hours", [
+    ("7:30", 7.5),
+    ("07:30", 7.5),
+    ("07:30:36", 7.51),
+    ("01.03.2024 07:30", 7.5),
+    (datetime.time(7, 30), 7.5),
+    (datetime.datetime(2024, 3, 1, 7, 30), 7.5),
+    (pd.Timestamp("2024-03-01 07:30"), 7.5),
+    (7.5 / 24, 7.5),
+    (0, 0),
+    (1, 24),
+    (1.5, np.nan),
+    ("Prisutan", np.nan),
+    ("", np.nan),
+    (None, np.nan),
+    (np.nan, np.nan),
+])
+def test_clock_hours(value, hours):
+    np.testing.assert_allclose(clock_hours([value]), [hours])
+
+
+def test_clock_hours_of_repeated_values():
+    np.testing.assert_allclose(clock_hours(["8:00", None, "8:00", "16:15", None]), [8, np.nan, 8, 16.25, np.nan])
+
+
+def test_worked_hours():
+    days = pd.DataFrame({"Početak": ["07:00", "22:00", "07:00", None, None],
+                         "Kraj": ["15:30", "06:00", None, "15:00", None]})
+    np.testing.assert_allclose(worked_hours(days), [8.5, 8, np.nan, np.nan, np.nan])
+    assert open_sessions(days).tolist() == [False, False, True, True, False]
+
+
+def grid(sessions, value=8, hours_tolerance=HOURS_TOLERANCE):
+    # A grid of one person with value hours in MasterTeam and the given Jantar sessions on day 1
+    export = jantar({"HORVAT ANA": {1: sessions}})
+    days = export.daily(["Korisnik"]).assign(Datum=lambda frame: pd.to_datetime(frame["Datum"], dayfirst=True))
+    return MonthGrid.from_frames(PERIOD, masterteam({"HORVAT ANA": {1: value}}), days, pn({}),
+                                 hours_tolerance=hours_tolerance)
+
+
+def test_sessions_of_a_day_add_up():
+    month = grid([("07:00", "11:00", "Prisutan"), ("12:00", "16:15", None), ("22:00", "01:00", None)])
+    assert month.worked_hours[0, 0] == 11.25
+
+
+def test_day_with_an_open_session_is_unknown():
+    month = grid([("07:00", "11:00", "Prisutan"), ("12:00", None, None)])
+    assert np.isnan(month.worked_hours[0, 0])
+    assert month.hours_mismatch().empty
+
+
+@pytest.mark.parametrize("end, flagged", [("15:30", False), ("15:31", True), ("14:30", False), ("14:29", True)])
+def test_hours_mismatch_tolerance(end, flagged):
+    report = grid(("07:00", end, "Prisutan")).hours_mismatch()
+    assert len(report) == flagged
+    if flagged:
+        assert report["Sati (Jantar)"].iloc[0] == round(clock_hours([end])[0] - 7, 2)
@@ -0,0 +1,168 @@
+"""Parity of the Jantar parsers with the row loop of the original app, and of streaming with whole-file reads."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from masterjantar import synthetic
+from masterjantar.ingest import iter_rows, read_excel
+from masterjantar.jantar import DAY_FIELDS, parse_jantar, parse_jantar_sections, parse_jantar_stream
+from masterjantar.loaders import read_bytes
+
+
+def baseline_jantar(df_J):
+    """The iterrows loop the app used before the masterjantar package (without its print)."""
+    metadata = {}
+    all_data = []
+    current_section = None
+
+    for index, row in df_J.iterrows():
+        first_col = str(row.iloc[0]).strip()
+        second_col = row.iloc[1] if len(row) > 1 else None
+
+        if first_col in ["Korisnik", "Razdoblje", "Odjel", "Raspored", "Kartica korisnika"]:
+            metadata[first_col] = second_col
+        elif first_col in ["Suma", "Saldo za razdoblje", "Radna obveza"]:
+            metadata[first_col] = second_col
+        elif first_col in ["Prekovremeno", "Stimulacija", "Stanje", "Prijenos", "Godišnji", "Stari godišnji",
+                           "Dvokratni rad", "Broj obroka", "Broj prijevoza"]:
+            metadata[first_col] = second_col
+        elif first_col in ["Statistika", "Vrijeme", "Ukupno", "Vremenski razrez", "Vrijeme", ""]:
+            continue
+        elif row.iloc[4] in ["Vremenski razrez", "Vrijeme"] or row.iloc[5] == "Ukupno":
+            continue
+        elif not first_col:
+            continue
+        elif first_col == "Dan":
+            current_section = {**metadata}
+            continue
+        elif current_section:
+            row_data = row.tolist()
+            while len(row_data) < 8:
+                row_data.append(None)
+
+            if all(x is None or pd.isna(x) for x in row_data[:8]):
+                continue
+
+            combined_row = {
+                **current_section,
+                "Dan": row_data[0],
+                "Datum": row_data[1],
+                "Početak": row_data[2],
+                "Unnamed 1": row_data[3],
+                "Kraj": row_data[4],
+                "Unnamed 2": row_data[5],
+                "Ukupno": row_data[6],
+                "Statistika": row_data[7]
+            }
+            all_data.append(combined_row)
+
+    df_J_cleaned = pd.DataFrame(all_data)
+    df_J_cleaned['Korisnik'] = df_J_cleaned['Korisnik'].str.strip().str.upper()
+    df_J_cleaned['Datum'] = df_J_cleaned['Datum'].ffill()
+    return df_J_cleaned
+
+
+def raw_export(people, seed=0, width=10):
+    """A raw Jantar sheet (as read with header=None) with the rows the parsers have to tell apart.
+
+    Only every other person has an Odjel and only the third a Kartica
+    korisnika, so the other sections carry over the values set before them.
+    """
+    rng = random.Random(seed)
+    rows = []
+
+    def row(*values):
+        rows.append([*values, *[np.nan] * (width - len(values))][:width])
+
+    row("Izvještaj o prisutnosti")
+    for person in range(people):
+        row("Korisnik", f" Prezime{person} Ime{person} ")
+        row("Razdoblje", "01.03.2024 - 31.03.2024")
+        if person % 2 == 0:
+            row("Odjel", f"Odjel {person % 3}")
+        row("Raspored", "Jutarnji")
+        if person == 2:
+            row("Kartica korisnika", 1234)
+        row()
+        row("Dan", "Datum", "Početak", np.nan, "Kraj", np.nan, "Ukupno", "Statistika")
+        for day in range(1, 29):
+            status = rng.choice(["Prisutan", "Odsutan", "Vikend", "Godišnji odmor"])
+            row(["Pon", "Uto", "Sri"][day % 3], f"{day:02d}.03.2024", "07:00", np.nan, "15:00", np.nan, "8:00", status)
+            if rng.random() < 0.2:
+                # A second session on the same day, without Dan and Datum
+                row(np.nan, np.nan, "16:00", np.nan, "18:00", np.nan, "2:00", np.nan)
+            if rng.random() < 0.05:
+                row()
+        row(np.nan, np.nan, np.nan, np.nan, "Vremenski razrez")
+        row("Suma", "160:00")
+        row("Saldo za razdoblje", "0:00")
+        row("Radna obveza", "168:00")
+        if rng.random() < 0.5:
+            row("Prekovremeno", 0)
+        row("Godišnji", rng.randint(0, 5))
+        row("Statistika")
+        row("   ")
+        row("Prisutan", 18, np.nan, np.nan, np.nan, "Ukupno")
+    return pd.DataFrame(rows)
+
+
+def test_synthetic_export_matches_baseline(tmp_path):
+    path = synthetic.generate(tmp_path, 25, "2024-03")["jantar"]
+    df_J = pd.read_excel(path, header=None)
+    assert_frame_equal(parse_jantar(df_J), baseline_jantar(df_J))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_raw_export_matches_baseline(seed):
+    df_J = raw_export(6, seed)
+    assert_frame_equal(parse_jantar(df_J), baseline_jantar(df_J))
+
+
+def test_metadata_carries_over_to_later_sections():
+    parsed = parse_jantar(raw_export(4))
+    odjel = parsed.groupby("Korisnik", sort=False)["Odjel"].first()
+    assert odjel.tolist() == ["Odjel 0", "Odjel 0", "Odjel 2", "Odjel 2"]
+    assert parsed.loc[parsed["Korisnik"] == "PREZIME3 IME3", "Kartica korisnika"].eq(1234).all()
+
+
+@pytest.mark.parametrize("width", [6, 7])
+def test_narrow_export_matches_baseline(width):
+    # The loop pads short rows with None, the parser with NaN like any other empty cell
+    df_J = raw_export(4, width=width)
+    baseline = baseline_jantar(df_J)
+    assert_frame_equal(parse_jantar(df_J), baseline.mask(baseline.isna(), np.nan).infer_objects())
+
+
+def test_empty_export():
+    # The loop fails on an export without daily rows; the parser returns no rows
+    df_J = raw_export(0)
+    with pytest.raises((KeyError, IndexError)):
+        baseline_jantar(df_J)
+    parsed = parse_jantar(df_J)
+    assert parsed.empty
+    assert list(parsed.columns) == DAY_FIELDS
+
+
+def _assert_same_export(streamed, whole):
+    assert_frame_equal(streamed.sections, whole.sections)
+    assert_frame_equal(streamed.days, whole.days)
+    assert streamed.wide_columns == whole.wide_columns
+
+
+@pytest.mark.parametrize("chunksize", [1, 50, 100_000])
+def test_streaming_matches_whole_file_read(tmp_path, chunksize):
+    data = read_bytes(synthetic.generate(tmp_path, 25, "2024-03")["jantar"])
+    whole = parse_jantar_sections(read_excel(data, header=None, dtype=object))
+    _assert_same_export(parse_jantar_stream(iter_rows(data), chunksize), whole)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_carries_metadata_across_chunks(tmp_path, seed):
+    path = tmp_path / "jantar.xlsx"
+    raw_export(6, seed).to_excel(path, header=False, index=False)
+    data = read_bytes(path)
+    whole = parse_jantar_sections(read_excel(data, header=None, dtype=object))
+    _assert_same_export(parse_jantar_stream(iter_rows(data), 40), whole)
@@ -0,0 +1,67 @@
+"""Which names the PersonIndex joins into one person."""
+import pandas as pd
+
+from masterjantar.persons import PersonIndex, name_key, normalize_name
+
+
+def index(masterteam, jantar=(), pn=()):
+    return PersonIndex.from_frames(pd.DataFrame({"PREZIME i IME": list(masterteam)}),
+                                   pd.DataFrame({"Korisnik": list(jantar)}, dtype=object),
+                                   pd.DataFrame({"Prezime Ime": list(pn)}, dtype=object))
+
+
+def test_keys():
+    assert name_key("  Čosić   ana ") == "ČOSIĆ ANA"
+    assert normalize_name("  Čosić   ana ") == "COSIC ANA"
+    assert normalize_name("Đurić Željko") == "DURIC ZELJKO"
+    assert name_key(None) is None and normalize_name(float("nan")) is None
+    assert name_key("   ") is None
+
+
+def test_exact_match_ignores_case_and_spaces():
+    persons = index(["HORVAT ANA"], jantar=["Horvat  Ana "], pn=["horvat ana"])
+    assert len(persons) == 1
+    assert persons.lookup(["HORVAT ANA", "Horvat  Ana ", "horvat ana"]).tolist() == [0, 0, 0]
+
+
+def test_loose_match_when_unique():
+    # Jantar without diacritics finds the only MasterTeam person it can be
+    persons = index(["ČOSIĆ ANA"], jantar=["Cosic Ana"])
+    assert len(persons) == 1
+    assert persons.keys(["Cosic Ana"]).tolist() == ["ČOSIĆ ANA"]
+    assert persons.unmatched().empty
+
+
+def test_masterteam_names_are_never_merged():
+    persons = index(["ČOSIĆ ANA", "ĆOSIĆ ANA", "COSIC ANA"])
+    assert len(persons) == 3
+    assert persons.lookup(["ČOSIĆ ANA", "ĆOSIĆ ANA", "COSIC ANA"]).tolist() == [0, 1, 2]
+    assert set(persons.clashes()["PREZIME i IME"]) == {"ČOSIĆ ANA", "ĆOSIĆ ANA", "COSIC ANA"}
+
+
+def test_no_loose_match_when_ambiguous():
+    persons = index(["ČOSIĆ ANA", "ĆOSIĆ ANA"], jantar=["Cosic Ana"], pn=["ČOSIĆ ANA"])
+    assert persons.lookup(["Cosic Ana", "ČOSIĆ ANA"]).tolist() == [2, 0]
+    assert persons.unmatched()["Ime"].tolist() == ["Cosic Ana"]
+
+
+def test_exact_match_wins_over_loose():
+    # "ČOSIĆ ANA" in Jantar is the MasterTeam person of that spelling, although
+    # "COSIC ANA" also has its loose key
+    persons = index(["COSIC ANA", "ČOSIĆ ANA"], jantar=["Čosić Ana", "cosic ana"])
+    assert persons.lookup(["Čosić Ana", "cosic ana"]).tolist() == [1, 0]
+
+
+def test_jantar_names_merge_loosely_with_each_other():
+    # Without a MasterTeam person, the spellings of one source still join
+    persons = index(["HORVAT ANA"], jantar=["Šarić Ivan"], pn=["Saric Ivan"])
+    assert len(persons) == 2
+    assert persons.lookup(["Šarić Ivan", "Saric Ivan"]).tolist() == [1, 1]
+
+
+def test_suggestions():
+    persons = index(["KOVAČEVIĆ MARIJA", "HORVAT ANA"], jantar=["Kovacevic Marja", "Babić Ivan"])
+    unmatched = persons.unmatched(suggest=True).set_index("Ime")["Prijedlog (MasterTeam)"]
+    assert unmatched["Kovacevic Marja"] == "KOVAČEVIĆ MARIJA"
+    assert pd.isna(unmatched["Babić Ivan"])
+    assert persons.unmatched()["Prijedlog (MasterTeam)"].isna().all()
@@ -0,0 +1,111 @@
+"""Parity of expand_pn with the per-order date_range loop of the original app."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from masterjantar.pn import expand_pn
+from masterjantar.schemas import PN_COLUMNS
+
+
+def baseline_expand(df_pn):
+    """The iterrows loop the app used before the masterjantar package."""
+    # Remove the "SVEUKUPNO" rows
+    df_pn = df_pn[df_pn['Broj PN\n'] != 'SVEUKUPNO'].copy()
+
+    df_pn["Dat. Polaska"] = pd.to_datetime(df_pn["Dat. Polaska"], errors='coerce')
+    df_pn["Dat. Povratka"] = pd.to_datetime(df_pn["Dat. Povratka"], errors='coerce')
+
+    expanded_rows = []
+    for _, row in df_pn.iterrows():
+        if pd.notna(row["Dat. Polaska"]) and pd.notna(row["Dat. Povratka"]):
+            date_range = pd.date_range(row["Dat. Polaska"], row["Dat. Povratka"])
+            for date in date_range:
+                expanded_rows.append({
+                    "Prezime Ime": row['Prezime i ime'],
+                    "Datum": date.strftime("%d.%m.%Y"),
+                    "Razlog odsutnosti": row["Zadatak službenog puta"]
+                })
+    return pd.DataFrame(expanded_rows)
+
+
+def orders(*trips):
+    """A travel-order table from (Broj PN, name, departure, return) tuples."""
+    return pd.DataFrame([(number, name, start, end, f"Zadatak {i}")
+                         for i, (number, name, start, end) in enumerate(trips)], columns=PN_COLUMNS)
+
+
+def assert_matches_baseline(df_pn):
+    expanded = expand_pn(df_pn)
+    baseline = baseline_expand(df_pn)
+    if baseline.empty:
+        assert expanded.empty
+        return
+    # The loop wrote dates as dd.mm.yyyy text, which the report parsed back
+    baseline["Datum"] = pd.to_datetime(baseline["Datum"], format="%d.%m.%Y")
+    assert_frame_equal(expanded, baseline, check_dtype=False)
+
+
+def test_whole_days():
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", datetime.datetime(2024, 3, 4), datetime.datetime(2024, 3, 6)),
+        (2, "BABIĆ IVAN", datetime.datetime(2024, 3, 10), datetime.datetime(2024, 3, 10)),
+        (3, "HORVAT ANA", datetime.datetime(2024, 2, 28), datetime.datetime(2024, 3, 2)),
+    ))
+
+
+@pytest.mark.parametrize("start, end", [
+    ("07:30", "10:00"),
+    ("16:00", "08:00"),
+    ("00:00", "23:59"),
+    ("23:59", "00:00"),
+])
+def test_times_of_day(start, end):
+    # date_range steps whole days from the departure time, so a return earlier
+    # in the day than the departure leaves out the last day
+    departure = pd.Timestamp(f"2024-03-04 {start}")
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", departure, pd.Timestamp(f"2024-03-06 {end}")),
+        (2, "BABIĆ IVAN", departure, pd.Timestamp(f"2024-03-04 {end}")),
+    ))
+
+
+def test_return_before_departure():
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", datetime.datetime(2024, 3, 6), datetime.datetime(2024, 3, 4)),
+        (2, "BABIĆ IVAN", datetime.datetime(2024, 3, 4), datetime.datetime(2024, 3, 5)),
+    ))
+
+
+def test_missing_dates():
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", datetime.datetime(2024, 3, 4), None),
+        (2, "BABIĆ IVAN", None, datetime.datetime(2024, 3, 5)),
+        (3, "MARIĆ PETRA", datetime.datetime(2024, 3, 4), "nije upisano"),
+        (4, "JURIĆ LUKA", datetime.datetime(2024, 3, 7), datetime.datetime(2024, 3, 8)),
+    ))
+
+
+def test_sveukupno_row():
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", datetime.datetime(2024, 3, 4), datetime.datetime(2024, 3, 5)),
+        ("SVEUKUPNO", None, datetime.datetime(2024, 3, 1), datetime.datetime(2024, 3, 31)),
+    ))
+
+
+def test_only_rows_without_trips():
+    assert_matches_baseline(orders(
+        (1, "HORVAT ANA", None, None),
+        ("SVEUKUPNO", None, np.nan, np.nan),
+    ))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_orders(seed):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 31 * 24 * 60, 200), unit="min")
+    end = start + pd.to_timedelta(rng.integers(-2 * 24 * 60, 10 * 24 * 60, 200), unit="min")
+    trips = [(i, f"OSOBA {i % 40}", s, e if i % 17 else None) for i, (s, e) in enumerate(zip(start, end))]
+    assert_matches_baseline(orders(*trips, ("SVEUKUPNO", None, None, None)))
@@ -0,0 +1,74 @@
+"""The store's incremental re-checks give the same reports as a full reconcile of the same exports."""
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from masterjantar.report import REPORTS, reconcile
+from masterjantar.store import MonthStore
+from tests.months import PERIOD, jantar, masterteam, pn, present
+
+
+def assert_same_reports(store, sources):
+    stored = store.reconcile(PERIOD, *(frame.copy() for frame in sources))
+    full = reconcile(PERIOD, *(frame.copy() for frame in sources))
+    for report in REPORTS:
+        assert_frame_equal(stored[report], full[report], check_dtype=False, obj=report)
+    return stored
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MonthStore(str(tmp_path / "store.sqlite"))
+
+
+def test_growing_month(store):
+    # Mid-month runs: every run adds days to MasterTeam and Jantar
+    for last_day in (5, 12, 20):
+        days = range(1, last_day + 1)
+        sources = (masterteam({"HORVAT ANA": {d: 8 for d in days}, "BABIĆ IVAN": {d: 8 for d in days}}),
+                   jantar({"HORVAT ANA": present(days), "BABIĆ IVAN": present(days[:-2], end="17:00")}),
+                   pn({"BABIĆ IVAN": [last_day - 1]}))
+        assert_same_reports(store, sources)
+
+
+def test_changed_then_reverted_value(store):
+    days = range(1, 11)
+
+    def month(value):
+        return (masterteam({"HORVAT ANA": {d: value if d == 4 else 8 for d in days}}),
+                jantar({"HORVAT ANA": present(days)}), pn({}))
+
+    assert_same_reports(store, month(8))
+    changed = assert_same_reports(store, month("GO"))
+    assert changed["changed_days"] == 1
+    assert len(changed["absent_per_masterteam"]) == 1
+    reverted = assert_same_reports(store, month(8))
+    assert reverted["changed_days"] == 1
+    assert reverted["absent_per_masterteam"].empty
+
+
+def test_diacritic_clash(store):
+    # "Cosic Ana" could be either MasterTeam person, so it matches neither,
+    # also when only one of them is re-checked
+    days = range(1, 6)
+
+    def month(cosic, clocked):
+        return (masterteam({"ČOSIĆ ANA": cosic, "ĆOSIĆ ANA": {d: 8 for d in days}}),
+                jantar({"Cosic Ana": present(clocked)}), pn({}))
+
+    first = assert_same_reports(store, month({d: 8 for d in days}, days))
+    second = assert_same_reports(store, month({**{d: 8 for d in days}, 3: np.nan}, range(1, 4)))
+    for reports in (first, second):
+        assert reports["absent_per_masterteam"].empty
+        assert set(reports["absent_per_jantar"]["PREZIME i IME"]) == {"ČOSIĆ ANA", "ĆOSIĆ ANA"}
+        assert reports["unmatched_names"]["Ime"].tolist() == ["COSIC ANA"]
+
+
+def test_open_session_closed_later(store):
+    # The last day is re-checked once its session is clocked out
+    days = range(1, 6)
+    for end in (None, "14:00"):
+        sources = (masterteam({"HORVAT ANA": {d: 8 for d in days}}),
+                   jantar({"HORVAT ANA": {**present(days[:-1]), 5: ("07:00", end, "Prisutan")}}), pn({}))
+        reports = assert_same_reports(store, sources)
+        assert len(reports["hours_mismatch"]) == (end is not None)
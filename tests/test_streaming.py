@@ -0,0 +1,28 @@
+"""Streamed MasterTeam and PN reads give the same frames as whole-file reads (Jantar: see test_jantar)."""
+import pytest
+from pandas.testing import assert_frame_equal
+
+from masterjantar import synthetic
+from masterjantar.ingest import iter_rows
+from masterjantar.loaders import load_masterteam, load_pn, read_bytes
+from masterjantar.masterteam import parse_masterteam_stream
+from masterjantar.pn import expand_pn_stream
+
+
+@pytest.fixture(scope="module")
+def exports(tmp_path_factory):
+    paths = synthetic.generate(tmp_path_factory.mktemp("exports"), 40, "2024-02")
+    return {kind: read_bytes(path) for kind, path in paths.items()}
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 100_000])
+def test_masterteam(exports, chunksize):
+    period, melted = load_masterteam(exports["masterteam"], streaming=False)
+    streamed_period, streamed = parse_masterteam_stream(iter_rows(exports["masterteam"]), chunksize)
+    assert streamed_period == period
+    assert_frame_equal(streamed, melted)
+
+
+@pytest.mark.parametrize("chunksize", [1, 5, 100_000])
+def test_pn(exports, chunksize):
+    assert_frame_equal(expand_pn_stream(iter_rows(exports["pn"]), chunksize), load_pn(exports["pn"], streaming=False))
@@ -0,0 +1,63 @@
+"""Legacy .xls exports parse to the same frames as the same exports saved as .xlsx."""
+import datetime
+import os
+
+import openpyxl
+import pytest
+from pandas.testing import assert_frame_equal
+
+from masterjantar import synthetic
+from masterjantar.layout import layout_profiles
+from masterjantar.loaders import load_jantar, load_pn, read_bytes
+from masterjantar.masterteam import read_masterteam
+
+xlwt = pytest.importorskip("xlwt")
+
+
+def save_as_xls(path):
+    """The first sheet of an .xlsx file written as .xls."""
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Sheet1")
+    styles = {datetime.datetime: xlwt.easyxf(num_format_str="dd.mm.yyyy"),
+              datetime.time: xlwt.easyxf(num_format_str="hh:mm")}
+    rows = openpyxl.load_workbook(path, read_only=True).worksheets[0].iter_rows(values_only=True)
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            if value is not None:
+                sheet.write(r, c, value, styles.get(type(value), xlwt.Style.default_style))
+    xls = os.path.splitext(path)[0] + ".xls"
+    book.save(xls)
+    return xls
+
+
+@pytest.fixture(scope="module")
+def exports(tmp_path_factory):
+    paths = synthetic.generate(tmp_path_factory.mktemp("exports"), 30, "2024-03")
+    return {kind: (read_bytes(path), read_bytes(save_as_xls(path))) for kind, path in paths.items()}
+
+
+@pytest.fixture(autouse=True)
+def detect_every_layout():
+    # Detect each file's layout instead of reusing the profile of the other format
+    layout_profiles.clear()
+
+
+def test_masterteam(exports):
+    xlsx, xls = exports["masterteam"]
+    period, melted = read_masterteam(xlsx)
+    xls_period, xls_melted = read_masterteam(xls)
+    assert xls_period == period
+    assert_frame_equal(xls_melted, melted)
+
+
+def test_jantar(exports):
+    xlsx, xls = exports["jantar"]
+    whole = load_jantar(xlsx, streaming=False, cache=False)
+    xls_whole = load_jantar(xls, streaming=False, cache=False)
+    assert_frame_equal(xls_whole.sections, whole.sections)
+    assert_frame_equal(xls_whole.days, whole.days)
+
+
+def test_pn(exports):
+    xlsx, xls = exports["pn"]
+    assert_frame_equal(load_pn(xls, streaming=False, cache=False), load_pn(xlsx, streaming=False, cache=False))